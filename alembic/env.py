@@ -13,6 +13,9 @@ from app.db.base import Base
 # Import all models to ensure they are registered with Base.metadata
 from app.models.user import User
 from app.models.otp import OTP
+from app.models.email_outbox import EmailOutbox
+from app.models.refresh_token import RefreshToken
+from app.db.otp_partitions import PARENT_TABLE, partition_day
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -30,6 +33,12 @@ config.set_main_option("sqlalchemy.url", str(settings.DATABASE_URI))
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names) -> bool:
+    # otps partitions are managed by app.db.otp_partitions, not by the models
+    if type_ == "table" and (name == f"{PARENT_TABLE}_default" or partition_day(name) is not None):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -46,6 +55,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -55,7 +65,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
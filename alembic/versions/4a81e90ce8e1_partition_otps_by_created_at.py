@@ -0,0 +1,98 @@
+"""Partition_otps_by_created_at
+
+Revision ID: 4a81e90ce8e1
+Revises: a2123ba5f08f
+Create Date: 2026-10-18 10:41:07.553219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a81e90ce8e1'
+down_revision: Union[str, Sequence[str], None] = 'a2123ba5f08f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Daily partitions created up front; app.db.otp_partitions keeps them rolling.
+PRECREATE_DAYS = 7
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Postgres cannot turn an existing table into a partitioned one, so build a
+    # new table and carry over only the codes that can still be used.
+    op.rename_table('otps', 'otps_legacy')
+    op.execute("ALTER TABLE otps_legacy RENAME CONSTRAINT otps_pkey TO otps_legacy_pkey")
+    op.drop_index('ix_otps_email', table_name='otps_legacy')
+
+    op.execute("""
+        CREATE TABLE otps (
+            id UUID NOT NULL,
+            email VARCHAR NOT NULL,
+            code VARCHAR NOT NULL,
+            type VARCHAR NOT NULL,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            is_used BOOLEAN NOT NULL DEFAULT false,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE otps_default PARTITION OF otps DEFAULT")
+    op.execute(f"""
+        DO $$
+        DECLARE
+            day DATE;
+        BEGIN
+            FOR day IN SELECT generate_series(
+                (now() AT TIME ZONE 'UTC')::date - 1,
+                (now() AT TIME ZONE 'UTC')::date + {PRECREATE_DAYS},
+                interval '1 day'
+            )::date LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF otps FOR VALUES FROM (%L) TO (%L)',
+                    'otps_p' || to_char(day, 'YYYYMMDD'),
+                    day::text || ' 00:00:00+00',
+                    (day + 1)::text || ' 00:00:00+00'
+                );
+            END LOOP;
+        END $$
+    """)
+    op.create_index(
+        'ix_otps_active_lookup', 'otps', ['email', 'type', 'created_at'], unique=False,
+        postgresql_include=['expires_at'], postgresql_where=sa.text('is_used = false'),
+    )
+
+    op.execute("""
+        INSERT INTO otps (id, email, code, type, expires_at, is_used, created_at)
+        SELECT id, email, code, type, expires_at, false, COALESCE(created_at, now())
+        FROM otps_legacy
+        WHERE COALESCE(is_used, false) = false AND expires_at > now()
+    """)
+    op.drop_table('otps_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('otps_unpartitioned',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_used', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO otps_unpartitioned (id, email, code, type, expires_at, is_used, created_at)
+        SELECT id, email, code, type, expires_at, is_used, created_at FROM otps
+    """)
+    # Dropping the parent drops every partition with it
+    op.drop_table('otps')
+    op.rename_table('otps_unpartitioned', 'otps')
+    op.execute("ALTER TABLE otps RENAME CONSTRAINT otps_unpartitioned_pkey TO otps_pkey")
+    op.create_index(op.f('ix_otps_email'), 'otps', ['email'], unique=False)
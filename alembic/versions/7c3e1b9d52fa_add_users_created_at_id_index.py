@@ -0,0 +1,32 @@
+"""Add_users_created_at_id_index
+
+Revision ID: 7c3e1b9d52fa
+Revises: 4a81e90ce8e1
+Create Date: 2026-10-18 14:05:12.530114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e1b9d52fa'
+down_revision: Union[str, Sequence[str], None] = '4a81e90ce8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination order for the admin listing/export. Built concurrently
+    # so a large users table stays writable during the migration.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""Add_users_tokens_valid_after
+
+Revision ID: d4f2a7c91e3b
+Revises: b81f4c6e0d37
+Create Date: 2026-10-18 16:20:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f2a7c91e3b'
+down_revision: Union[str, Sequence[str], None] = 'b81f4c6e0d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default, so adding it doesn't rewrite the table
+    op.add_column('users', sa.Column('tokens_valid_after', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_tokens_valid_after', 'users', ['tokens_valid_after'], unique=False,
+            postgresql_where=sa.text('tokens_valid_after IS NOT NULL'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_tokens_valid_after', table_name='users', postgresql_concurrently=True)
+    op.drop_column('users', 'tokens_valid_after')
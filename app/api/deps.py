@@ -1,55 +1,119 @@
 
-from typing import AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
+from app.core.rate_limit import rate_limiter
 from app.db.session import get_db
-from app.models.user import User
+from app.db.unit_of_work import UnitOfWork
 from app.repos.user_repo import UserRepo
 from app.repos.otp_repo import OTPRepo
+from app.repos.otp_store import MemoryOTPStore, OTPStore, SQLOTPStore
+from app.repos.outbox_repo import OutboxRepo
+from app.repos.refresh_token_repo import RefreshTokenRepo
 from app.services.email_service import EmailService
 from app.services.auth_service import AuthService
-from app.schemas.token import TokenPayload
+from app.services.google_oauth import GoogleOAuthClient, google_oauth
+from app.services.token_epochs import token_epochs
+from app.services.user_import_service import UserImportService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+memory_otp_store = MemoryOTPStore()
+
 async def get_user_repo(db: AsyncSession = Depends(get_db)) -> UserRepo:
     return UserRepo(db)
 
 async def get_otp_repo(db: AsyncSession = Depends(get_db)) -> OTPRepo:
     return OTPRepo(db)
 
-async def get_email_service() -> EmailService:
-    return EmailService()
+async def get_otp_store(otp_repo: OTPRepo = Depends(get_otp_repo)) -> OTPStore:
+    if settings.OTP_STORE_BACKEND == "memory":
+        return memory_otp_store
+    return SQLOTPStore(otp_repo)
+
+async def get_outbox_repo(db: AsyncSession = Depends(get_db)) -> OutboxRepo:
+    return OutboxRepo(db)
+
+async def get_refresh_token_repo(db: AsyncSession = Depends(get_db)) -> RefreshTokenRepo:
+    return RefreshTokenRepo(db)
+
+async def get_email_service(outbox_repo: OutboxRepo = Depends(get_outbox_repo)) -> EmailService:
+    return EmailService(outbox_repo)
+
+async def get_uow(db: AsyncSession = Depends(get_db)) -> UnitOfWork:
+    return UnitOfWork(db)
+
+def rate_limit(rule: str):
+    """Per-IP throttle for a route, resolved before the route's other dependencies."""
+    async def check(request: Request):
+        await rate_limiter.check_ip(rule, request.client.host if request.client else "unknown")
+    return check
+
+def idempotency_key(idempotency_key: Optional[str] = Header(None)) -> Optional[str]:
+    return idempotency_key
+
+def get_google_oauth() -> GoogleOAuthClient:
+    return google_oauth
 
 async def get_auth_service(
     user_repo: UserRepo = Depends(get_user_repo),
-    otp_repo: OTPRepo = Depends(get_otp_repo),
-    email_service: EmailService = Depends(get_email_service)
+    otp_store: OTPStore = Depends(get_otp_store),
+    email_service: EmailService = Depends(get_email_service),
+    uow: UnitOfWork = Depends(get_uow),
+    google_oauth: GoogleOAuthClient = Depends(get_google_oauth),
+    refresh_token_repo: RefreshTokenRepo = Depends(get_refresh_token_repo)
 ) -> AuthService:
-    return AuthService(user_repo, otp_repo, email_service)
+    return AuthService(user_repo, otp_store, email_service, uow, google_oauth, refresh_token_repo)
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     user_repo: UserRepo = Depends(get_user_repo)
-) -> User:
+) -> Principal:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_access_token(token)
+        # In memory; revocations are loaded in the background
+        revoked = token_epochs.revoked(token_data.sub, token_data.iat)
     except (JWTError, ValidationError):
+        revoked = True
+    if revoked:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await user_repo.get_user_by_email(token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        # Primary, not a replica: the row is cached for the full TTL, and a lagging
+        # replica could refill the cache with what a just-committed write invalidated
+        user = await user_repo.get_user_row(token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return principal
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+async def get_user_import_service(
+    user_repo: UserRepo = Depends(get_user_repo),
+    uow: UnitOfWork = Depends(get_uow)
+) -> UserImportService:
+    return UserImportService(
+        user_repo,
+        uow,
+        batch_size=settings.USER_IMPORT_BATCH_SIZE,
+        hash_concurrency=settings.USER_IMPORT_HASH_CONCURRENCY,
+    )
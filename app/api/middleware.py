@@ -0,0 +1,51 @@
+
+import time
+
+from app.core.metrics import (
+    db_queries_per_request,
+    http_request_duration,
+    http_requests,
+    http_requests_in_flight,
+    request_query_count,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """Records per-route request counts, latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = http_requests_in_flight.labels(method)
+        status_code = 500
+        query_count = [0]
+        token = request_query_count.set(query_count)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            request_query_count.reset(token)
+            # Routing stores the matched route in the scope; use its template so
+            # path parameters don't explode the label space.
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            http_request_duration.labels(method, path).observe(elapsed)
+            http_requests.labels(method, path, str(status_code)).inc()
+            db_queries_per_request.labels().observe(query_count[0])
@@ -0,0 +1,64 @@
+
+from typing import Any, Type
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: pydantic-core's JSON encoder instead of stdlib json."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+class ModelSerializer:
+    """JSON responses for one response model, set up once at import.
+
+    Returning its Response from an endpoint skips FastAPI's response_model
+    handling (validate, dump to Python objects, then encode); the model goes
+    straight to JSON bytes in pydantic-core. Keep `response_model=` on the route
+    for the OpenAPI schema.
+
+    Only use it for objects the app built itself (ORM rows, service results):
+    their fields are copied without re-running validators such as the email
+    check, which would otherwise dominate the cost.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self.serializer = model.__pydantic_serializer__
+
+    def response(self, obj: Any, status_code: int = 200) -> Response:
+        if not isinstance(obj, self.model):
+            obj = self.model.model_construct(**{name: getattr(obj, name) for name in self.fields})
+        return Response(self.serializer.to_json(obj), status_code=status_code, media_type="application/json")
+
+class ConstantResponse:
+    """A fixed JSON body encoded once; each call only builds the Response around it."""
+
+    def __init__(self, content: Any, status_code: int = 200):
+        self.body = to_json(content)
+        self.status_code = status_code
+
+    def __call__(self) -> Response:
+        return Response(self.body, status_code=self.status_code, media_type="application/json")
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse for endpoints that are still reading the request body
+    while they stream their response.
+
+    Under ASGI < 2.4 Starlette listens for disconnects by calling receive()
+    alongside the stream, which would steal body chunks from request.stream().
+    Here a disconnect only shows up as a failed send.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -1,6 +1,7 @@
 
 from fastapi import APIRouter
-from app.api.v1.routers import auth
+from app.api.v1.routers import admin, auth
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
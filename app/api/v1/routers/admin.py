@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from typing import Any, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api import deps
+from app.api.responses import BodyStreamingResponse
+from app.core.config import settings
+from app.core.principal_cache import Principal
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserAdminResponse, UserPage
+from app.services.user_import_service import UserImportService
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.stream import iter_lines
+
+router = APIRouter()
+
+@router.post("/users/import")
+async def import_users(
+    request: Request,
+    admin: Principal = Depends(deps.get_current_admin),
+    import_service: UserImportService = Depends(deps.get_user_import_service)
+) -> Any:
+    """Stream NDJSON (default) or CSV (`Content-Type: text/csv`) rows of
+    `email` plus `password` or `hashed_password`, optionally `is_verified`.
+
+    The response is NDJSON with one result per row and a final summary line.
+    """
+    format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    lines = iter_lines(request.stream(), settings.USER_IMPORT_MAX_LINE_BYTES)
+    report = (json.dumps(result) + "\n" async for result in import_service.import_users(lines, format))
+    return BodyStreamingResponse(report, media_type="application/x-ndjson")
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    provider: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    admin: Principal = Depends(deps.get_current_admin),
+    user_repo: UserRepo = Depends(deps.get_user_repo)
+) -> Any:
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    # One extra row tells us whether there is a next page
+    users = await user_repo.list_users(limit + 1, after, provider, is_verified, is_active)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+    return UserPage(items=users, next_cursor=next_cursor)
+
+EXPORT_FIELDS = ["id", "email", "provider", "is_active", "is_verified", "created_at"]
+
+@router.get("/users/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    provider: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    admin: Principal = Depends(deps.get_current_admin),
+    user_repo: UserRepo = Depends(deps.get_user_repo)
+) -> Any:
+    """Stream every matching user as NDJSON or CSV, in (created_at, id) order."""
+    rows = user_repo.stream_users(provider, is_verified, is_active, fetch_size=settings.USER_EXPORT_FETCH_SIZE)
+
+    async def ndjson():
+        async for row in rows:
+            yield UserAdminResponse.model_validate(row).model_dump_json() + "\n"
+
+    async def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+        async for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow([getattr(row, field) for field in EXPORT_FIELDS])
+            yield buffer.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(
+            csv_lines(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+        )
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -1,30 +1,49 @@
 
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from app.services.auth_service import AuthService
 from app.api import deps
+from app.api.responses import ConstantResponse, ModelSerializer
+from app.core.idempotency import idempotency
+from app.core.principal_cache import Principal
+from app.core.rate_limit import rate_limiter
 from app.schemas.user import UserCreate, UserResponse, OTPVerify, ForgotPassword, ResetPassword
-from app.schemas.token import Token
+from app.schemas.token import RefreshRequest, Token
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserResponse)
+# Built once; endpoints return ready Responses so FastAPI skips response_model work
+user_response = ModelSerializer(UserResponse)
+token_response = ModelSerializer(Token)
+registration_verified = ConstantResponse({"message": "Registration verified successfully"})
+otp_sent = ConstantResponse({"message": "If the email exists, an OTP has been sent"})
+otp_valid = ConstantResponse({"message": "OTP is valid"})
+password_reset = ConstantResponse({"message": "Password reset successfully"})
+logged_out = ConstantResponse({"message": "Logged out of all sessions"})
+
+@router.post("/register", response_model=UserResponse, dependencies=[Depends(deps.rate_limit("otp_send"))])
 async def register(
     user_in: UserCreate,
-    auth_service: AuthService = Depends(deps.get_auth_service)
+    auth_service: AuthService = Depends(deps.get_auth_service),
+    idempotency_key: Optional[str] = Depends(deps.idempotency_key)
 ) -> Any:
-    return await auth_service.register(user_in)
+    # A replayed retry doesn't hash, send an email or count against the limit again
+    async def run():
+        await rate_limiter.check_email("otp_send", user_in.email)
+        return user_response.response(await auth_service.register(user_in))
+    return await idempotency.run("register", idempotency_key, user_in.model_dump_json().encode(), run)
 
-@router.post("/verify-registration")
+@router.post("/verify-registration", dependencies=[Depends(deps.rate_limit("otp_verify"))])
 async def verify_registration(
     otp_in: OTPVerify,
     auth_service: AuthService = Depends(deps.get_auth_service)
 ) -> Any:
+    await rate_limiter.check_email("otp_verify", otp_in.email)
     await auth_service.verify_registration(otp_in.email, otp_in.otp)
-    return {"message": "Registration verified successfully"}
+    return registration_verified()
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(deps.rate_limit("login"))])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     auth_service: AuthService = Depends(deps.get_auth_service)
@@ -33,31 +52,57 @@ async def login(
     # Here username in form_data is email
     from app.schemas.user import UserLogin
     user_in = UserLogin(email=form_data.username, password=form_data.password)
-    return await auth_service.login(user_in)
+    # Before the service call, so throttled attempts never reach bcrypt
+    await rate_limiter.check_email("login", user_in.email)
+    return token_response.response(await auth_service.login(user_in))
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_in: RefreshRequest,
+    auth_service: AuthService = Depends(deps.get_auth_service)
+) -> Any:
+    return token_response.response(await auth_service.refresh(refresh_in.refresh_token))
 
-@router.post("/forgot-password")
+@router.post("/logout-all")
+async def logout_all(
+    current_user: Principal = Depends(deps.get_current_user),
+    auth_service: AuthService = Depends(deps.get_auth_service)
+) -> Any:
+    await auth_service.logout_all(current_user.id, current_user.email)
+    return logged_out()
+
+@router.post("/forgot-password", dependencies=[Depends(deps.rate_limit("otp_send"))])
 async def forgot_password(
     forgot_in: ForgotPassword,
-    auth_service: AuthService = Depends(deps.get_auth_service)
+    auth_service: AuthService = Depends(deps.get_auth_service),
+    idempotency_key: Optional[str] = Depends(deps.idempotency_key)
 ) -> Any:
-    await auth_service.forgot_password(forgot_in.email)
-    return {"message": "If the email exists, an OTP has been sent"}
+    async def run():
+        await rate_limiter.check_email("otp_send", forgot_in.email)
+        await auth_service.forgot_password(forgot_in.email)
+        return otp_sent()
+    return await idempotency.run("forgot-password", idempotency_key, forgot_in.model_dump_json().encode(), run)
 
-@router.post("/verify-reset-otp")
+@router.post("/verify-reset-otp", dependencies=[Depends(deps.rate_limit("otp_verify"))])
 async def verify_reset_otp(
     otp_in: OTPVerify,
     auth_service: AuthService = Depends(deps.get_auth_service)
 ) -> Any:
+    await rate_limiter.check_email("otp_verify", otp_in.email)
     await auth_service.verify_reset_password_otp(otp_in.email, otp_in.otp)
-    return {"message": "OTP is valid"}
+    return otp_valid()
 
-@router.post("/reset-password")
+@router.post("/reset-password", dependencies=[Depends(deps.rate_limit("otp_verify"))])
 async def reset_password(
     reset_in: ResetPassword,
-    auth_service: AuthService = Depends(deps.get_auth_service)
+    auth_service: AuthService = Depends(deps.get_auth_service),
+    idempotency_key: Optional[str] = Depends(deps.idempotency_key)
 ) -> Any:
-    await auth_service.reset_password(reset_in.email, reset_in.otp, reset_in.new_password)
-    return {"message": "Password reset successfully"}
+    async def run():
+        await rate_limiter.check_email("otp_verify", reset_in.email)
+        await auth_service.reset_password(reset_in.email, reset_in.otp, reset_in.new_password)
+        return password_reset()
+    return await idempotency.run("reset-password", idempotency_key, reset_in.model_dump_json().encode(), run)
 
 @router.get("/google/login")
 async def google_login():
@@ -65,7 +110,7 @@ async def google_login():
     from fastapi.responses import RedirectResponse
     
     return RedirectResponse(
-        f"https://accounts.google.com/o/oauth2/auth?response_type=code&client_id={settings.GOOGLE_CLIENT_ID}&redirect_uri={settings.GOOGLE_REDIRECT_URI}&scope=openid%20email%20profile&access_type=offline"
+        f"{settings.GOOGLE_AUTH_URI}?response_type=code&client_id={settings.GOOGLE_CLIENT_ID}&redirect_uri={settings.GOOGLE_REDIRECT_URI}&scope=openid%20email%20profile&access_type=offline"
     )
 
 @router.get("/google/callback", response_model=Token)
@@ -73,4 +118,4 @@ async def google_callback(
     code: str,
     auth_service: AuthService = Depends(deps.get_auth_service)
 ) -> Any:
-    return await auth_service.google_login(code)
+    return token_response.response(await auth_service.google_login(code))
@@ -1,12 +1,16 @@
 
-from typing import List, Union, Optional, Any
+import json
+from typing import Annotated, List, Literal, Union, Optional, Any
 from pydantic import AnyHttpUrl, PostgresDsn, field_validator, ValidationInfo
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Enterprise Template"
     API_V1_STR: str = "/api/v1"
     
+    # Prometheus metrics middleware and /metrics endpoint
+    METRICS_ENABLED: bool = True
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -38,16 +42,174 @@ class Settings(BaseSettings):
             host=info.data.get("POSTGRES_SERVER"),
             path=f"{info.data.get('POSTGRES_DB') or ''}",
         ))
+
+    # Connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Disable prepared statement caching for PgBouncer transaction pooling
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Read replicas: full SQLAlchemy URLs, comma separated. Only reads that opt in
+    # (bind_arguments=REPLICA) use them; everything else goes to DATABASE_URI.
+    DATABASE_REPLICA_URIS: Annotated[List[str], NoDecode] = []
+
+    @field_validator("DATABASE_REPLICA_URIS", mode="before")
+    @classmethod
+    def assemble_replica_uris(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str):
+            if v.startswith("["):
+                return json.loads(v)
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    DB_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    DB_REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    # Replicas further behind than this are taken out of rotation
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    # How long a replica that lost a connection or failed a check stays out
+    DB_REPLICA_EJECT_SECONDS: float = 30.0
+
+    # Production server (python -m app.serve)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # Defaults to the CPUs available to the process (affinity and cgroup quota)
+    SERVER_WORKERS: Optional[int] = None
+    SERVER_BACKLOG: int = 2048
+    # Longer than the load balancer's idle timeout, so it closes idle connections first
+    SERVER_KEEPALIVE_SECONDS: int = 75
+    # On SIGTERM, how long in-flight requests get to finish
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    # Proxies trusted for X-Forwarded-For/Proto (uvicorn's default: 127.0.0.1)
+    SERVER_FORWARDED_ALLOW_IPS: Optional[str] = None
+    # Import the app once and fork workers from it: faster start, shared memory
+    SERVER_PRELOAD: bool = False
+    # Preloaded workers that die within SERVER_FAST_FAILURE_SECONDS of starting are
+    # restarted after an exponential backoff; after SERVER_MAX_FAST_FAILURES in a row
+    # the server gives up and exits non-zero (0 keeps restarting)
+    SERVER_RESTART_BACKOFF_SECONDS: float = 0.5
+    SERVER_FAST_FAILURE_SECONDS: float = 10.0
+    SERVER_MAX_FAST_FAILURES: int = 5
+    # Total primary connections across all workers; each worker's pool gets an
+    # equal share (pool size capped at DB_POOL_SIZE, the rest as overflow)
+    DB_CONNECTION_BUDGET: Optional[int] = None
+
+    # Startup warmup, run by the app lifespan before the first request is served
+    WARMUP_ENABLED: bool = True
+    # Pool connections opened and primed at startup (defaults to DB_POOL_SIZE)
+    WARMUP_DB_CONNECTIONS: Optional[int] = None
+    # Past this, startup carries on and the remaining warmup is abandoned
+    WARMUP_TIMEOUT_SECONDS: float = 30.0
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # With RS256/ES256: directory of <kid>.pem keys. All are published at
+    # /.well-known/jwks.json; the private key named by JWT_SIGNING_KID (default:
+    # the greatest kid) signs new tokens.
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_SIGNING_KID: Optional[str] = None
+    # How long verifiers may cache the JWKS; publish a new key at least this
+    # long before signing with it
+    JWKS_MAX_AGE_SECONDS: int = 3600
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Max number of verified access tokens kept in memory (0 disables the cache)
+    TOKEN_CACHE_SIZE: int = 10000
+    # Current-user lookups; the TTL bounds how long a deactivation can take to apply
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    # How often each worker picks up token revocations (logout-all, password
+    # reset) made by other workers
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = 2.0
+
+    # Accounts allowed to use the /admin endpoints
+    ADMIN_EMAILS: Annotated[List[str], NoDecode] = []
+
+    @field_validator("ADMIN_EMAILS", mode="before")
+    @classmethod
+    def assemble_admin_emails(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str):
+            if v.startswith("["):
+                return json.loads(v)
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    # Bulk user import: rows per INSERT/commit, concurrent hashing jobs
+    # (defaults to the hashing pool's worker count), longest accepted line
+    USER_IMPORT_BATCH_SIZE: int = 500
+    USER_IMPORT_HASH_CONCURRENCY: Optional[int] = None
+    USER_IMPORT_MAX_LINE_BYTES: int = 65536
+    # Rows fetched per round trip by the streaming export's server-side cursor
+    USER_EXPORT_FETCH_SIZE: int = 1000
+
+    # Request throttling, per client IP and per email, over a sliding window.
+    # Behind a proxy run uvicorn with --proxy-headers so the client IP is real.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_LOGIN_PER_IP: int = 30
+    RATE_LIMIT_LOGIN_PER_EMAIL: int = 10
+    RATE_LIMIT_OTP_SEND_PER_IP: int = 10
+    RATE_LIMIT_OTP_SEND_PER_EMAIL: int = 3
+    RATE_LIMIT_OTP_VERIFY_PER_IP: int = 30
+    RATE_LIMIT_OTP_VERIFY_PER_EMAIL: int = 10
+
+    # OTP storage: "sql" (otps table) or "memory" (in-process, single worker)
+    OTP_STORE_BACKEND: Literal["sql", "memory"] = "sql"
+    # Repeated OTP requests: an active code issued less than the resend window
+    # ago is sent again (expiry extended) instead of replaced, and nothing is
+    # sent if it already went out within the debounce (0 disables either)
+    OTP_RESEND_WINDOW_SECONDS: float = 300.0
+    OTP_EMAIL_DEBOUNCE_SECONDS: float = 60.0
+
+    # Daily otps partitions: how many to create ahead, how many days to keep,
+    # and how often the app checks them and purges old refresh tokens
+    # (0 leaves both to scripts/maintain_otp_partitions.py)
+    OTP_PARTITION_PRECREATE_DAYS: int = 7
+    OTP_PARTITION_RETENTION_DAYS: int = 2
+    OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+
+    # Idempotency-Key on register, forgot-password and reset-password: how long
+    # a response is replayed, how many are kept in memory, and how long another
+    # worker waits for a duplicate that is still running (shared backend only)
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_LOCK_SECONDS: float = 30.0
+
+    # Password hashing pool (defaults to one worker per CPU)
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    # Hash policy for new hashes; stored hashes made under another scheme or cost
+    # are replaced on the next successful login. Pick the cost with
+    # scripts/calibrate_password_hash.py. argon2 needs the argon2-cffi package.
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_KIB: int = 65536
+    # Threads per hash; the hashing pool already spreads logins over the cores
+    PASSWORD_ARGON2_PARALLELISM: int = 1
     
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
     GOOGLE_REDIRECT_URI: Optional[str] = None
+    # Endpoints are overridable so development and tests can use a stand-in server
+    GOOGLE_AUTH_URI: str = "https://accounts.google.com/o/oauth2/auth"
+    GOOGLE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_JWKS_URI: str = "https://www.googleapis.com/oauth2/v3/certs"
+    GOOGLE_ISSUERS: List[str] = ["https://accounts.google.com", "accounts.google.com"]
+    # Used when the JWKS response carries no Cache-Control max-age
+    GOOGLE_JWKS_DEFAULT_TTL_SECONDS: float = 3600.0
+
+    # Shared outbound HTTP client (keep-alive pool, lives as long as the app)
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
     
     # Email (Mock)
     SMTP_TLS: bool = True
@@ -58,6 +220,17 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
 
+    # Email outbox worker
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_CONCURRENCY: int = 10
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 5.0
+    # Sent and dead jobs are deleted this long after they were queued
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: float = 3600.0
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
 settings = Settings()
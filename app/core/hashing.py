@@ -0,0 +1,122 @@
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import Histogram, registry, stats_collector
+
+# bcrypt("warmup") at the minimum cost factor, only used by PasswordHasher.warmup()
+WARMUP_HASH = "$2b$04$L81An4Kykxg19Zp9Wpf1QOaTjh7wSTs4j6B1YaoNf/6aP3kVE7Myu"
+
+def _run_timed(fn: Callable, *args) -> Tuple[float, Any]:
+    # Executed inside the worker process: report when the job actually started
+    # so the caller can tell queue wait apart from hashing time.
+    started_at = time.time()
+    return started_at, fn(*args)
+
+class PasswordHasher:
+    """Runs bcrypt hashing/verification on a bounded process pool.
+
+    At most ``workers + queue_size`` jobs may be pending at once; anything beyond
+    that is rejected with a 503 instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.capacity = self.workers + self.queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.queue_wait = Histogram()
+        self.run_time = Histogram()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _run_timed, fn, *args
+            )
+        finally:
+            self.pending -= 1
+        finished_at = time.time()
+        self.queue_wait.observe(max(started_at - submitted_at, 0.0))
+        self.run_time.observe(finished_at - started_at)
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(security.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(security.verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Like verify(); also returns a new hash when the stored one is outdated.
+        The rehash runs in the same job, so it only costs extra when it happens."""
+        verified, new_hash = await self._submit(security.verify_and_update_password, plain_password, hashed_password)
+        if new_hash is not None:
+            self.rehashed += 1
+        return verified, new_hash
+
+    async def warmup(self):
+        """Start every worker process now rather than on the first logins.
+
+        Each worker also loads the bcrypt backend by checking a 4-round hash,
+        which costs about a millisecond.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, security.verify_password, "warmup", WARMUP_HASH)
+            for _ in range(self.workers)
+        ))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "run_seconds": self.run_time.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+registry.register_collector(stats_collector("password_hash", password_hasher.stats))
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import hmac
+import time
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Protocol
+
+from fastapi import HTTPException, status
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.metrics import registry, stats_collector
+from app.utils.cache import TTLCache
+
+MAX_KEY_LENGTH = 255
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    body: bytes
+
+    def response(self) -> Response:
+        return Response(
+            self.body, status_code=self.status_code, media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+def fingerprint(payload: bytes) -> str:
+    # Keyed, since payloads can hold passwords and shared stores can leak
+    return hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).hexdigest()
+
+class IdempotencyBackend(ABC):
+    """Where finished responses are kept, by idempotency key."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        """The response stored for `key`, if any."""
+
+    @abstractmethod
+    async def set(self, key: str, stored: StoredResponse, ttl: float):
+        """Keep `stored` for `ttl` seconds."""
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        """Reserve `key` across workers; False if another worker holds it.
+        A per-process backend has nothing to reserve beyond the store's own
+        in-flight tracking."""
+        return True
+
+    async def release(self, key: str):
+        pass
+
+    def clear(self):
+        pass
+
+class MemoryIdempotencyBackend(IdempotencyBackend):
+    """Per-process responses, LRU-evicted beyond `maxsize` keys.
+
+    A retry that lands on another worker runs again; use a shared backend
+    when requests are spread over several processes.
+    """
+
+    def __init__(self, maxsize: int):
+        self.cache = TTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, stored: StoredResponse, ttl: float):
+        self.cache.set(key, stored, time.time() + ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+class KeyValueClient(Protocol):
+    """The subset of the redis.asyncio client the shared backend needs."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, px: Optional[int] = None, nx: bool = False) -> object: ...
+
+    async def delete(self, key: str) -> object: ...
+
+class KeyValueIdempotencyBackend(IdempotencyBackend):
+    """Responses shared by all workers, plus a short lock so a duplicate on
+    another worker waits instead of running in parallel."""
+
+    def __init__(self, client: KeyValueClient, prefix: str = "idempotency"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        value = await self.client.get(f"{self.prefix}:{key}")
+        if value is None:
+            return None
+        fingerprint, status_code, body = value.split(b"\n", 2)
+        return StoredResponse(fingerprint.decode(), int(status_code), body)
+
+    async def set(self, key: str, stored: StoredResponse, ttl: float):
+        value = b"%s\n%d\n%s" % (stored.fingerprint.encode(), stored.status_code, stored.body)
+        await self.client.set(f"{self.prefix}:{key}", value, px=int(ttl * 1000))
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        return bool(await self.client.set(f"{self.prefix}:{key}:lock", b"1", px=int(ttl * 1000), nx=True))
+
+    async def release(self, key: str):
+        await self.client.delete(f"{self.prefix}:{key}:lock")
+
+class IdempotencyStore:
+    """Runs each (scope, Idempotency-Key) once and replays its response.
+
+    A duplicate that arrives while the first request is still running waits
+    for it on the same worker, or polls the shared backend when another
+    worker holds the key. Only successful responses are stored: after an
+    error, concurrent waiters get the same error and a later retry runs again.
+    Reusing a key with a different payload is rejected.
+    """
+
+    def __init__(self, backend: IdempotencyBackend, ttl: float, lock_ttl: float, poll_interval: float = 0.05):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.mismatched = 0
+
+    def set_backend(self, backend: IdempotencyBackend):
+        self.backend = backend
+
+    def _replay(self, stored: StoredResponse, payload_fingerprint: str) -> Response:
+        if stored.fingerprint != payload_fingerprint:
+            self.mismatched += 1
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        self.replayed += 1
+        return stored.response()
+
+    async def _wait_for_other_worker(self, key: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            stored = await self.backend.get(key)
+            if stored is not None:
+                return stored
+            if await self.backend.claim(key, self.lock_ttl):
+                return None
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+        )
+
+    async def run(self, scope: str, idempotency_key: Optional[str], payload: bytes, call: Callable[[], Awaitable[Response]]) -> Response:
+        if idempotency_key is None:
+            return await call()
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+        key = f"{scope}:{idempotency_key}"
+        payload_fingerprint = fingerprint(payload)
+
+        while True:
+            stored = await self.backend.get(key)
+            if stored is not None:
+                return self._replay(stored, payload_fingerprint)
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.waited += 1
+            try:
+                return self._replay(await asyncio.shield(inflight), payload_fingerprint)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The first request was cancelled (client went away); take over
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            if not await self.backend.claim(key, self.lock_ttl):
+                stored = await self._wait_for_other_worker(key)
+                if stored is not None:
+                    future.set_result(stored)
+                    self.waited += 1
+                    return self._replay(stored, payload_fingerprint)
+            try:
+                self.executed += 1
+                response = await call()
+                stored = StoredResponse(payload_fingerprint, response.status_code, bytes(response.body))
+                if response.status_code < 300:
+                    await self.backend.set(key, stored, self.ttl)
+            finally:
+                await self.backend.release(key)
+            future.set_result(stored)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Retrieved by any waiter; don't warn when there was none
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        stats = {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "mismatched": self.mismatched,
+            "inflight": len(self._inflight),
+        }
+        if isinstance(self.backend, MemoryIdempotencyBackend):
+            stats["keys"] = len(self.backend.cache)
+        return stats
+
+idempotency = IdempotencyStore(
+    backend=MemoryIdempotencyBackend(maxsize=settings.IDEMPOTENCY_CACHE_SIZE),
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+)
+registry.register_collector(stats_collector("idempotency", idempotency.stats))
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from jose import JWTError, jwk
+from jose.backends.base import Key
+from jose.constants import ALGORITHMS
+
+ASYMMETRIC_ALGORITHMS = ALGORITHMS.RSA_DS | ALGORITHMS.EC_DS
+
+class KeyRing:
+    """Signing keys by `kid`, parsed once.
+
+    Every key is published in the JWKS and accepted for verification; only
+    the signing key is used for new tokens. Rotating is a matter of
+    overlapping windows: publish the new key first, start signing with it
+    once verifiers have refreshed their JWKS, and drop the old one after the
+    last token it signed has expired.
+    """
+
+    def __init__(self, algorithm: str, keys: Dict[str, Key], signing_kid: Optional[str]):
+        if signing_kid is not None and signing_kid not in keys:
+            raise RuntimeError(f"JWT signing key {signing_kid!r} is not in the key ring")
+        self.algorithm = algorithm
+        self.keys = keys
+        self.signing_kid = signing_kid
+        self.public_keys = {kid: key if key.is_public() else key.public_key() for kid, key in keys.items()}
+        self.jwks = json.dumps({"keys": [
+            {**key.to_dict(), "kid": kid, "use": "sig", "alg": algorithm}
+            for kid, key in sorted(self.public_keys.items())
+        ]}).encode()
+        self.etag = '"' + hashlib.sha256(self.jwks).hexdigest()[:32] + '"'
+
+    @property
+    def signing_key(self) -> Key:
+        if self.signing_kid is None:
+            raise RuntimeError("No private key in the JWT key ring")
+        return self.keys[self.signing_kid]
+
+    def verification_key(self, kid: Optional[str]) -> Key:
+        key = self.public_keys.get(kid) if kid is not None else None
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return key
+
+def load_key_ring(directory: str, algorithm: str, signing_kid: Optional[str] = None) -> KeyRing:
+    """Read `<kid>.pem` files from `directory`.
+
+    Private keys can sign; public keys are only published and used to verify
+    (e.g. a retired key kept until its tokens expire). Without `signing_kid`,
+    the private key with the greatest kid signs, so date-prefixed kids rotate
+    in order.
+    """
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise RuntimeError(f"JWT_KEYS_DIR needs an RS* or ES* ALGORITHM, not {algorithm}")
+    keys: Dict[str, Key] = {}
+    private = []
+    for path in sorted(Path(directory).glob("*.pem")):
+        key = jwk.construct(path.read_bytes(), algorithm)
+        keys[path.stem] = key
+        if not key.is_public():
+            private.append(path.stem)
+    if not keys:
+        raise RuntimeError(f"No *.pem keys in JWT_KEYS_DIR {directory}")
+    if signing_kid is None and private:
+        signing_kid = max(private)
+    if signing_kid is not None and keys.get(signing_kid) is not None and keys[signing_kid].is_public():
+        raise RuntimeError(f"JWT signing key {signing_kid!r} has no private part")
+    return KeyRing(algorithm, keys, signing_kid)
@@ -0,0 +1,185 @@
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket histogram. Buckets are preallocated so observe() never allocates."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+class MetricFamily:
+    """A named metric with label values. Children are created once per label tuple
+    and reused, so the hot path is a single dict lookup."""
+
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str], factory: Callable):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._factory()
+        return child
+
+    def children(self):
+        return self._children.items()
+
+# A collector yields (name, type, help, [(labels, value), ...]) for values that
+# live elsewhere (pool sizes, cache counters) and are read at scrape time.
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+class Registry:
+    def __init__(self):
+        self._families: List[MetricFamily] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        family = MetricFamily(name, help, "counter", labelnames, Counter)
+        self._families.append(family)
+        return family
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        family = MetricFamily(name, help, "gauge", labelnames, Gauge)
+        self._families.append(family)
+        return family
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        family = MetricFamily(name, help, "histogram", labelnames, lambda: Histogram(buckets))
+        self._families.append(family)
+        return family
+
+    def register_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for values, child in family.children():
+                labels = dict(zip(family.labelnames, values))
+                if isinstance(child, Histogram):
+                    lines.extend(_render_histogram(family.name, labels, child.snapshot()))
+                else:
+                    lines.append(f"{family.name}{_format_labels(labels)} {child.value}")
+        for collector in self._collectors:
+            for name, type, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type}")
+                for labels, value in samples:
+                    if type == "histogram":
+                        lines.extend(_render_histogram(name, labels, value))
+                    else:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+def _render_histogram(name: str, labels: Dict[str, str], snapshot: dict) -> List[str]:
+    lines = []
+    for bound, count in snapshot["buckets"]:
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': str(bound)})} {count}")
+    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {snapshot['count']}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+@contextmanager
+def timed(histogram: Histogram):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+def stats_collector(prefix: str, stats: Callable[[], dict]) -> Collector:
+    """Expose a component's stats() dict: numbers become gauges, Histogram snapshots histograms."""
+    def collect():
+        for key, value in stats().items():
+            name = f"{prefix}_{key}"
+            if isinstance(value, dict) and "buckets" in value:
+                yield name, "histogram", f"{prefix} {key}", [({}, value)]
+            elif isinstance(value, (int, float)):
+                yield name, "gauge", f"{prefix} {key}", [({}, value)]
+    return collect
+
+def labeled_stats_collector(prefix: str, label: str, stats: Callable[[], Dict[str, dict]]) -> Collector:
+    """Like stats_collector for several components, e.g. one pool per engine:
+    `stats()` maps each label value to that component's stats() dict."""
+    def collect():
+        samples: Dict[str, Tuple[str, list]] = {}
+        for value, component in stats().items():
+            for key, stat in component.items():
+                if isinstance(stat, dict) and "buckets" in stat:
+                    type = "histogram"
+                elif isinstance(stat, (int, float)):
+                    type = "gauge"
+                else:
+                    continue
+                samples.setdefault(key, (type, []))[1].append(({label: value}, stat))
+        for key, (type, values) in samples.items():
+            yield f"{prefix}_{key}", type, f"{prefix} {key}", values
+    return collect
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served", ("method",))
+db_query_duration = registry.histogram("db_query_duration_seconds", "Duration of individual SQL statements", ("engine",))
+db_queries_per_request = registry.histogram("db_queries_per_request", "SQL statements executed per HTTP request", buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34))
+auth_operation_duration = registry.histogram("auth_operation_duration_seconds", "Time spent in AuthService by operation", ("operation",))
+
+# Per-request SQL statement counter, set by the metrics middleware. A one-element
+# list so the engine hooks can bump it in place without touching the context.
+request_query_count: ContextVar[Optional[List[int]]] = ContextVar("request_query_count", default=None)
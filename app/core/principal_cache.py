@@ -0,0 +1,89 @@
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry, stats_collector
+from app.utils.cache import TTLCache
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Read-only snapshot of the fields authenticated requests need from a User."""
+    id: uuid.UUID
+    email: str
+    provider: Optional[str]
+    is_active: bool
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            provider=user.provider,
+            is_active=bool(user.is_active),
+            is_verified=bool(user.is_verified),
+        )
+
+class InvalidationChannel:
+    """Fan-out of principal invalidations between workers.
+
+    The default implementation is process-local. A shared implementation (Redis
+    pub/sub, Postgres LISTEN/NOTIFY, ...) publishes the email and calls every
+    subscribed callback when a message arrives from any worker.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def subscribe(self, callback: Callable[[str], None]):
+        self._subscribers.append(callback)
+
+    async def publish(self, email: str):
+        pass
+
+    def deliver(self, email: str):
+        for callback in self._subscribers:
+            callback(email)
+
+class PrincipalCache:
+    """TTL + LRU cache of principals keyed by email.
+
+    The TTL bounds how long a change made on another worker can go unnoticed
+    if an invalidation message is lost.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, channel: Optional[InvalidationChannel] = None):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize)
+        self.channel = None
+        self.set_channel(channel or InvalidationChannel())
+
+    def set_channel(self, channel: InvalidationChannel):
+        self.channel = channel
+        channel.subscribe(self._cache.pop)
+
+    def get(self, email: str) -> Optional[Principal]:
+        return self._cache.get(email)
+
+    def set(self, principal: Principal):
+        if self.ttl > 0:
+            self._cache.set(principal.email, principal, time.time() + self.ttl)
+
+    async def invalidate(self, email: str):
+        self._cache.pop(email)
+        await self.channel.publish(email)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+registry.register_collector(stats_collector("principal_cache", principal_cache.stats))
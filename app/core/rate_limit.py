@@ -0,0 +1,162 @@
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import registry, stats_collector
+
+def _retry_after(previous: float, current: int, limit: int, elapsed: float, window: float) -> float:
+    """Seconds until one more hit fits, assuming no other traffic meanwhile."""
+    if current + 1 > limit:
+        # Wait for the next window, then for this window's count (now the
+        # previous one) to decay enough to let a hit through
+        needed = max(1 - (limit - 1) / current, 0.0) if current else 0.0
+        return (1 - elapsed + needed) * window
+    needed = 1 - (limit - 1 - current) / previous
+    return max((needed - elapsed) * window, 0.0)
+
+class RateLimitBackend(ABC):
+    """Sliding-window counters. The estimate for a key is
+    `previous_window_count * (1 - elapsed_fraction) + current_window_count`,
+    which needs two integers per key instead of a log of timestamps."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        """Record a hit if it fits under `limit`; return (allowed, retry_after)."""
+
+    def clear(self):
+        pass
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters, LRU-evicted beyond `maxsize` keys.
+
+    Limits are enforced per worker, so the effective global limit is
+    `limit * workers`; use a shared backend when that matters.
+    """
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        # key -> [window index, current count, previous count]
+        self._counters: "OrderedDict[str, List[int]]" = OrderedDict()
+        self.evictions = 0
+
+    async def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        position = self.clock() / window
+        index = int(position)
+        elapsed = position - index
+        entry = self._counters.get(key)
+        if entry is None:
+            entry = self._counters[key] = [index, 0, 0]
+            if len(self._counters) > self.maxsize:
+                self._counters.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._counters.move_to_end(key)
+            if entry[0] != index:
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[1] = 0
+                entry[0] = index
+        # No await between the read and the increment, so this is atomic on the loop
+        if entry[2] * (1 - elapsed) + entry[1] + 1 > limit:
+            return False, _retry_after(entry[2], entry[1], limit, elapsed, window)
+        entry[1] += 1
+        return True, 0.0
+
+    def clear(self):
+        self._counters.clear()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+class CounterClient(Protocol):
+    """The subset of the redis.asyncio client the shared backend needs."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def pexpire(self, key: str, ms: int) -> object: ...
+
+class KeyValueRateLimitBackend(RateLimitBackend):
+    """Shared counters (one key per window) so limits hold across all workers.
+
+    Windows are aligned to wall-clock time so every worker agrees on them. A
+    rejected hit still increments the counter, which only makes the limit stricter.
+    """
+
+    def __init__(self, client: CounterClient, prefix: str = "ratelimit", clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    async def hit(self, key: str, limit: int, window: float) -> Tuple[bool, float]:
+        position = self.clock() / window
+        index = int(position)
+        elapsed = position - index
+        current_key = f"{self.prefix}:{key}:{index}"
+        current = await self.client.incr(current_key)
+        if current == 1:
+            await self.client.pexpire(current_key, int(window * 2000))
+        previous = int(await self.client.get(f"{self.prefix}:{key}:{index - 1}") or 0)
+        if previous * (1 - elapsed) + current > limit:
+            return False, _retry_after(previous, current - 1, limit, elapsed, window)
+        return True, 0.0
+
+class RateLimiter:
+    """Named limits keyed by client IP and by email, checked before any real work."""
+
+    def __init__(self, limits: Dict[Tuple[str, str], int], window: float, backend: RateLimitBackend, enabled: bool = True):
+        self.limits = limits
+        self.window = window
+        self.backend = backend
+        self.enabled = enabled
+        self.rejected = 0
+
+    def set_backend(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def hit(self, rule: str, scope: str, value: str):
+        limit = self.limits.get((rule, scope))
+        if not self.enabled or not limit:
+            return
+        allowed, retry_after = await self.backend.hit(f"{rule}:{scope}:{value}", limit, self.window)
+        if not allowed:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+            )
+
+    async def check_ip(self, rule: str, ip: str):
+        await self.hit(rule, "ip", ip)
+
+    async def check_email(self, rule: str, email: str):
+        await self.hit(rule, "email", email.lower())
+
+    def stats(self) -> dict:
+        stats = {"rejected": self.rejected}
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            stats.update(keys=len(self.backend), evictions=self.backend.evictions)
+        return stats
+
+rate_limiter = RateLimiter(
+    limits={
+        ("login", "ip"): settings.RATE_LIMIT_LOGIN_PER_IP,
+        ("login", "email"): settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+        ("otp_send", "ip"): settings.RATE_LIMIT_OTP_SEND_PER_IP,
+        ("otp_send", "email"): settings.RATE_LIMIT_OTP_SEND_PER_EMAIL,
+        ("otp_verify", "ip"): settings.RATE_LIMIT_OTP_VERIFY_PER_IP,
+        ("otp_verify", "email"): settings.RATE_LIMIT_OTP_VERIFY_PER_EMAIL,
+    },
+    window=settings.RATE_LIMIT_WINDOW_SECONDS,
+    backend=MemoryRateLimitBackend(maxsize=settings.RATE_LIMIT_MAX_KEYS),
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+registry.register_collector(stats_collector("rate_limit", rate_limiter.stats))
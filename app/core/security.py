@@ -1,13 +1,50 @@
 
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
+from passlib.hash import argon2
 
 from app.core.config import settings
+from app.core.keys import load_key_ring
+from app.core.metrics import registry, stats_collector
+from app.schemas.token import TokenPayload
+from app.utils.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def password_context(scheme: str, bcrypt_rounds: int, argon2_time_cost: int, argon2_memory_kib: int, argon2_parallelism: int) -> CryptContext:
+    """Hashes with `scheme` at the given cost. Any hash made under another
+    scheme or cost reports needs_update(), so verify_and_update() replaces it."""
+    if scheme == "argon2" and not argon2.has_backend():
+        raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 needs the argon2-cffi package")
+    return CryptContext(
+        schemes=["bcrypt", "argon2"],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_kib,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+pwd_context = password_context(
+    settings.PASSWORD_HASH_SCHEME,
+    settings.PASSWORD_BCRYPT_ROUNDS,
+    settings.PASSWORD_ARGON2_TIME_COST,
+    settings.PASSWORD_ARGON2_MEMORY_KIB,
+    settings.PASSWORD_ARGON2_PARALLELISM,
+)
+
+# Asymmetric signing keys, parsed once at import; None means HS* with SECRET_KEY
+key_ring = load_key_ring(settings.JWT_KEYS_DIR, settings.ALGORITHM, settings.JWT_SIGNING_KID) if settings.JWT_KEYS_DIR else None
+
+# Already-verified access tokens, keyed by SHA-256 of the raw token and
+# expiring together with the token's own `exp` claim.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE)
+registry.register_collector(stats_collector("token_cache", token_cache.stats))
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
@@ -15,12 +52,49 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # Fractional `iat`, so a token issued right after a revocation isn't
+    # rounded down into it
+    to_encode = {"exp": expire, "sub": str(subject), "iat": time.time()}
+    if key_ring is not None:
+        return jwt.encode(to_encode, key_ring.signing_key, algorithm=key_ring.algorithm, headers={"kid": key_ring.signing_kid})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> TokenPayload:
+    """Verify `token` and return its payload, skipping signature checks for tokens seen before.
+
+    Raises JWTError or ValidationError for invalid tokens; those are never cached.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+
+    if key_ring is not None:
+        verification_key = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+        payload = jwt.decode(token, verification_key, algorithms=[key_ring.algorithm])
+    else:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, token_data, float(exp))
+    return token_data
+
+def generate_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 256 random bits, so a plain SHA-256 is enough to keep
+    # stored values useless if leaked, and it stays a single indexed lookup.
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and when the stored hash is outdated also return its replacement."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -0,0 +1,106 @@
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.metrics import registry, stats_collector
+from app.repos.otp_repo import OTPRepo
+from app.repos.refresh_token_repo import RefreshTokenRepo
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+logger = logging.getLogger(__name__)
+
+WARMUP_EMAIL = "warmup@example.com"
+
+async def _prime_statements(connection: AsyncConnection):
+    # Run the hot lookups once on this connection: SQLAlchemy caches the compiled
+    # SQL per engine and asyncpg prepares the statements per connection. The
+    # UPDATEs match nothing and everything is rolled back anyway.
+    async with AsyncSession(bind=connection, autoflush=False) as session:
+        user_repo = UserRepo(session)
+        await user_repo.get_user_by_email(WARMUP_EMAIL)
+        await user_repo.get_user_row(WARMUP_EMAIL)
+        if settings.OTP_STORE_BACKEND == "sql":
+            otp_repo = OTPRepo(session)
+            await otp_repo.get_latest_valid_otp(WARMUP_EMAIL, "register")
+            await otp_repo.get_latest_valid_code(WARMUP_EMAIL, "register")
+            await otp_repo.get_active_code(WARMUP_EMAIL, "reset_password")
+            await otp_repo.consume_latest_valid_otp(WARMUP_EMAIL, "register", "000000")
+        await RefreshTokenRepo(session).use("0" * 64)
+        await session.rollback()
+
+async def warm_database(engine: AsyncEngine, connections: int) -> int:
+    """Open `connections` pool connections at once and prime each of them.
+
+    They are all checked out together so the pool really opens that many, then
+    returned to it. Returns the number opened.
+    """
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)), return_exceptions=True)
+    ready = [c for c in opened if isinstance(c, AsyncConnection)]
+    try:
+        await asyncio.gather(*(_prime_statements(c) for c in ready))
+    finally:
+        for connection in ready:
+            await connection.close()
+    for error in opened:
+        if isinstance(error, BaseException):
+            raise error
+    return len(ready)
+
+async def prime_validators():
+    # email-validator loads its IDNA tables on first use
+    UserCreate.model_validate({"email": WARMUP_EMAIL, "password": "warmup"})
+
+class Warmup:
+    """Pays the first-request costs at startup: pool connections, SQL compilation,
+    hashing worker processes and validator setup.
+
+    A failing or slow step is logged and skipped; the app still starts.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.failures = 0
+        self.seconds: Dict[str, float] = {}
+
+    async def _step(self, name: str, fn: Callable[..., Awaitable], *args):
+        started = time.perf_counter()
+        try:
+            await fn(*args)
+        except Exception:
+            self.failures += 1
+            logger.exception("Warmup step %s failed", name)
+        self.seconds[name] = time.perf_counter() - started
+
+    async def _database(self, engine: AsyncEngine, connections: int):
+        self.connections = await warm_database(engine, connections)
+
+    async def run(self, engine: AsyncEngine, connections: int, timeout: float):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.gather(
+                self._step("validators", prime_validators),
+                self._step("database", self._database, engine, connections),
+                self._step("password_hasher", password_hasher.warmup),
+            ), timeout)
+        except asyncio.TimeoutError:
+            self.failures += 1
+            logger.warning("Warmup did not finish within %.1fs, serving anyway", timeout)
+        self.seconds["total"] = time.perf_counter() - started
+        logger.info("Warmup finished in %.3fs: %s", self.seconds["total"], self.stats())
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "failures": self.failures,
+            **{f"{step}_seconds": seconds for step, seconds in self.seconds.items()},
+        }
+
+warmup = Warmup()
+registry.register_collector(stats_collector("startup_warmup", warmup.stats))
@@ -0,0 +1,28 @@
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import Histogram, db_query_duration, request_query_count
+
+_query_durations: Dict[Engine, Histogram] = {}
+
+def query_duration(engine: Engine) -> Histogram:
+    """The query duration histogram of an instrumented engine."""
+    return _query_durations[engine]
+
+def instrument_engine(engine: Engine, name: str = "primary"):
+    """Time every statement and count it against the current request, if any."""
+    query_duration = _query_durations[engine] = db_query_duration.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        query_duration.observe(time.perf_counter() - conn.info["query_start"].pop())
+        counter = request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.otp_partitions import maintain_otp_partitions
+from app.repos.refresh_token_repo import RefreshTokenRepo
+
+logger = logging.getLogger(__name__)
+
+async def purge_refresh_tokens(session_factory, lifetime_days: int = settings.REFRESH_TOKEN_EXPIRE_DAYS) -> int:
+    before = datetime.now(timezone.utc) - timedelta(days=lifetime_days)
+    async with session_factory() as session:
+        purged = await RefreshTokenRepo(session).purge(before)
+        await session.commit()
+    if purged:
+        logger.info(f"Refresh tokens purged: {purged}")
+    return purged
+
+async def run_maintenance(engine: AsyncEngine, session_factory, partitions: bool = True) -> dict:
+    """OTP partition upkeep (when `partitions`) and the refresh token purge.
+
+    A failure in one step doesn't skip the other; the first error is raised
+    once both have run.
+    """
+    result = {}
+    error = None
+    if partitions:
+        try:
+            result.update(await maintain_otp_partitions(engine))
+        except Exception as e:
+            error = e
+    try:
+        result["refresh_tokens_purged"] = await purge_refresh_tokens(session_factory)
+    except Exception as e:
+        error = error or e
+    if error is not None:
+        raise error
+    return result
+
+async def run_maintenance_loop(engine: AsyncEngine, session_factory, interval: float, partitions: bool = True):
+    """Keep partitions rolling and old rows purged from inside the app; safe to run on every worker."""
+    while True:
+        try:
+            await run_maintenance(engine, session_factory, partitions)
+        except Exception:
+            logger.exception("Database maintenance failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,122 @@
+
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "otps"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{8}})$")
+
+def partition_name(day: date) -> str:
+    return f"{PARENT_TABLE}_p{day:%Y%m%d}"
+
+def partition_day(name: str) -> date | None:
+    match = PARTITION_RE.match(name)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+def partitions_to_drop(names: Iterable[str], today: date, retention_days: int) -> List[str]:
+    """Daily partitions whose whole day is older than the retention window.
+
+    The default partition and anything not named like a daily partition is kept.
+    """
+    cutoff = today - timedelta(days=retention_days)
+    return sorted(name for name in names if (day := partition_day(name)) is not None and day < cutoff)
+
+async def existing_partitions(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ), {"parent": PARENT_TABLE})
+    return [row[0] for row in result]
+
+async def create_partition(conn: AsyncConnection, day: date, has_default: bool):
+    """Create the partition for `day`, taking over any of its rows that landed
+    in the default partition.
+
+    CREATE TABLE ... PARTITION OF fails while the default partition holds
+    rows for the new range, so then the table is created standalone, the rows
+    are moved into it and it is attached; ATTACH builds the partitioned
+    indexes and rechecks the default partition.
+    """
+    name = partition_name(day)
+    start, end = f"{day.isoformat()} 00:00:00+00", f"{(day + timedelta(days=1)).isoformat()} 00:00:00+00"
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+    if has_default:
+        # Blocks inserts into the default partition until the move commits
+        await conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        stray = await conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"))
+        if stray:
+            await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            await conn.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ))
+            await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+            logger.warning(f"Moved OTP rows for {day} out of {DEFAULT_PARTITION} into {name}")
+            return
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+
+async def ensure_partitions(engine: AsyncEngine, today: date, days_ahead: int) -> List[str]:
+    """Create daily partitions from yesterday through `days_ahead` days from now,
+    each in its own transaction."""
+    created = []
+    async with engine.connect() as conn:
+        existing = set(await existing_partitions(conn))
+    for offset in range(-1, days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if name in existing:
+            continue
+        async with engine.begin() as conn:
+            await create_partition(conn, day, DEFAULT_PARTITION in existing)
+        created.append(name)
+    return created
+
+async def drop_expired_partitions(conn: AsyncConnection, today: date, retention_days: int) -> List[str]:
+    dropped = partitions_to_drop(await existing_partitions(conn), today, retention_days)
+    for name in dropped:
+        # Dropping a partition is a catalog operation; no per-row DELETE or vacuum debt.
+        await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    return dropped
+
+async def maintain_otp_partitions(
+    engine: AsyncEngine,
+    days_ahead: int = settings.OTP_PARTITION_PRECREATE_DAYS,
+    retention_days: int = settings.OTP_PARTITION_RETENTION_DAYS,
+) -> dict:
+    """Create upcoming partitions and drop expired ones.
+
+    The two steps run in separate transactions and a failure in one doesn't
+    skip the other; the first error is raised once both have run.
+    """
+    today = datetime.now(timezone.utc).date()
+    created: List[str] = []
+    dropped: List[str] = []
+    error = None
+    try:
+        created = await ensure_partitions(engine, today, days_ahead)
+    except Exception as e:
+        error = e
+    try:
+        async with engine.begin() as conn:
+            dropped = await drop_expired_partitions(conn, today, retention_days)
+    except Exception as e:
+        error = error or e
+    if created or dropped:
+        logger.info(f"OTP partitions created: {created}, dropped: {dropped}")
+    if error is not None:
+        raise error
+    return {"created": created, "dropped": dropped}
@@ -0,0 +1,78 @@
+
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Histogram
+
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIFETIME_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 21600.0, 86400.0)
+
+class PoolStats:
+    """Connection pool instrumentation: checkout wait, connection lifetime and counts."""
+
+    def __init__(self):
+        self.checkout_wait = Histogram(WAIT_BUCKETS)
+        self.connection_lifetime = Histogram(LIFETIME_BUCKETS)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.closes = 0
+        self._engine = None
+
+    def pool_class(self) -> type:
+        """Queue pool subclass that times how long each checkout waits for a connection.
+
+        Built per PoolStats (the class closes over it) so it survives the engine
+        recreating its pool after dispose().
+        """
+        stats = self
+
+        class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+            def _do_get(self):
+                start = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    stats.checkout_timeouts += 1
+                    raise
+                finally:
+                    stats.checkout_wait.observe(time.perf_counter() - start)
+
+        return InstrumentedAsyncQueuePool
+
+    def attach(self, engine: Engine):
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+            connection_record.info["connected_at"] = time.monotonic()
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts += 1
+
+        @event.listens_for(engine, "close")
+        def on_close(dbapi_connection, connection_record):
+            self.closes += 1
+            connected_at = connection_record.info.pop("connected_at", None)
+            if connected_at is not None:
+                self.connection_lifetime.observe(time.monotonic() - connected_at)
+
+        self._engine = engine
+
+    def snapshot(self) -> dict:
+        pool = self._engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "connects": self.connects,
+            "closes": self.closes,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "connection_lifetime_seconds": self.connection_lifetime.snapshot(),
+        }
@@ -0,0 +1,54 @@
+
+import time
+from typing import Any, Optional
+
+from sqlalchemy import Select
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import request_query_count
+from app.db.instrumentation import query_duration
+
+_dialect = PGDialect_asyncpg()
+
+class PreparedQuery:
+    """A read-only SELECT compiled to SQL once, at import.
+
+    `fetchrow` sends it straight to the session's asyncpg connection, where
+    asyncpg keeps it prepared, so a call skips statement building, SQLAlchemy's
+    compile cache lookup, result processing and the identity map. It runs in
+    the session's transaction, which it begins if it is the first statement.
+
+    Parameters are `bindparam()`s, passed by name. Values come back as asyncpg
+    decodes them; only use column types it returns natively (not JSON/enums).
+    With DB_PGBOUNCER_MODE the statement goes through the session instead,
+    which names its prepared statements safely for transaction pooling.
+    """
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+        compiled = stmt.compile(dialect=_dialect)
+        self.sql = compiled.string
+        self.params = tuple(compiled.positiontup)
+        # Values fixed in the statement itself, e.g. literals and LIMIT
+        self.defaults = compiled.params
+
+    async def fetchrow(self, session: AsyncSession, bind_arguments: Optional[dict] = None, **params: Any) -> Optional[tuple]:
+        if settings.DB_PGBOUNCER_MODE:
+            return (await session.execute(self.stmt, params, bind_arguments=bind_arguments)).first()
+        connection = await session.connection(bind_arguments=dict(bind_arguments) if bind_arguments else None)
+        raw = await connection.get_raw_connection()
+        adapter = raw.dbapi_connection
+        if not adapter._started:
+            # SQLAlchemy's asyncpg adapter sends BEGIN lazily, with the first
+            # statement it runs; a query sent past it would run on its own
+            await adapter._start_transaction()
+        started = time.perf_counter()
+        params = {**self.defaults, **params}
+        row = await raw.driver_connection.fetchrow(self.sql, *(params[name] for name in self.params))
+        query_duration(connection.sync_engine).observe(time.perf_counter() - started)
+        counter = request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+        return row
@@ -0,0 +1,163 @@
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# bind_arguments for reads that may be served by a replica
+REPLICA = {"replica": True}
+
+db_reads = registry.counter("db_routed_reads_total", "Replica-eligible reads by the engine that served them", ("engine",))
+
+# Replay lag, or 0 when the replica has replayed everything it received (an idle
+# primary writes nothing, so the last replay timestamp alone would keep growing)
+# and when the server isn't a replica at all.
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+def engine_name(uri: str) -> str:
+    url = make_url(uri)
+    return f"{url.host}:{url.port or 5432}/{url.database}"
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.lag = 0.0
+
+class ReplicaSet:
+    """Read replicas and their health.
+
+    A replica is ejected for `eject_seconds` when a query on it loses its
+    connection or a health check fails or finds it more than `max_lag` seconds
+    behind. A passing health check puts it back straight away. With no healthy
+    replica, reads go to the primary.
+    """
+
+    def __init__(self, engines: Dict[str, AsyncEngine], max_lag: float, eject_seconds: float,
+                 check_timeout: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        self.replicas = [Replica(name, engine) for name, engine in engines.items()]
+        self.max_lag = max_lag
+        self.eject_seconds = eject_seconds
+        self.check_timeout = check_timeout
+        self.clock = clock
+        self._next = itertools.count()
+        for replica in self.replicas:
+            self._watch_errors(replica)
+
+    def _watch_errors(self, replica: Replica):
+        @event.listens_for(replica.engine.sync_engine, "do_connect")
+        def on_connect(dialect, connection_record, cargs, cparams):
+            # Failed connects don't reach handle_error
+            try:
+                return dialect.connect(*cargs, **cparams)
+            except Exception as e:
+                self.eject(replica, f"connect failed: {e!r}")
+                raise
+
+        @event.listens_for(replica.engine.sync_engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect:
+                self.eject(replica, "connection lost")
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def healthy(self) -> List[Replica]:
+        now = self.clock()
+        return [replica for replica in self.replicas if replica.ejected_until <= now]
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica, round robin."""
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def eject(self, replica: Replica, reason: str):
+        if replica.ejected_until <= self.clock():
+            replica.ejections += 1
+            logger.warning("Ejecting read replica %s: %s", replica.name, reason)
+        replica.ejected_until = self.clock() + self.eject_seconds
+
+    async def _check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as connection:
+                lag = await asyncio.wait_for(connection.scalar(LAG_QUERY), self.check_timeout)
+        except Exception as e:
+            self.eject(replica, f"health check failed: {e!r}")
+            return
+        replica.lag = float(lag or 0)
+        if replica.lag > self.max_lag:
+            self.eject(replica, f"{replica.lag:.1f}s behind")
+        elif replica.ejected_until:
+            if replica.ejected_until > self.clock():
+                logger.info("Read replica %s is back in rotation", replica.name)
+            replica.ejected_until = 0.0
+
+    async def check(self):
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def run_health_checks(self, interval: float):
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def collect(self):
+        now = self.clock()
+        yield "db_replica_healthy", "gauge", "1 if the replica is in rotation", [
+            ({"engine": r.name}, int(r.ejected_until <= now)) for r in self.replicas
+        ]
+        yield "db_replica_lag_seconds", "gauge", "Replication lag seen by the last health check", [
+            ({"engine": r.name}, r.lag) for r in self.replicas
+        ]
+        yield "db_replica_ejections", "gauge", "Times the replica was taken out of rotation", [
+            ({"engine": r.name}, r.ejections) for r in self.replicas
+        ]
+
+class RoutingSession(Session):
+    """Session that sends reads asking for `bind_arguments=REPLICA` to a replica.
+
+    Everything else uses the primary (the session's bind): writes, flushes,
+    and any read after the session has written, so a request reads its own
+    writes. One replica is picked per session and kept.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+        elif replica and self.replicas and not self.info.get("wrote"):
+            chosen = self.info.get("replica")
+            if chosen is None or chosen.ejected_until > self.replicas.clock():
+                chosen = self.info["replica"] = self.replicas.choose()
+            if chosen is not None:
+                db_reads.labels(chosen.name).inc()
+                return chosen.engine.sync_engine
+        if replica:
+            db_reads.labels("primary").inc()
+        return super().get_bind(mapper, clause=clause, **kw)
@@ -1,11 +1,74 @@
 
+from typing import List
+from uuid import uuid4
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
+from app.core.metrics import labeled_stats_collector, registry, stats_collector
+from app.db.instrumentation import instrument_engine
+from app.db.pool_stats import PoolStats
+from app.db.routing import ReplicaSet, RoutingSession, engine_name
+
+def engine_options(pool_stats: PoolStats) -> dict:
+    connect_args = {
+        # asyncpg's own per-connection statement cache
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        # SQLAlchemy's prepared statement cache in the asyncpg adapter
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer in transaction mode can hand each statement a different server
+        # connection, so named prepared statements must be neither cached nor reused.
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "echo": False,
+        "future": True,
+        "poolclass": pool_stats.pool_class(),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+pool_stats = PoolStats()
+engine = create_async_engine(str(settings.DATABASE_URI), **engine_options(pool_stats))
+pool_stats.attach(engine.sync_engine)
+instrument_engine(engine.sync_engine)
+registry.register_collector(stats_collector("db_pool", pool_stats.snapshot))
+
+def create_replica_set(uris: List[str]) -> ReplicaSet:
+    engines = {}
+    replica_pool_stats = {}
+    for uri in uris:
+        name = engine_name(uri)
+        replica_pool_stats[name] = PoolStats()
+        engines[name] = create_async_engine(uri, **engine_options(replica_pool_stats[name]))
+        replica_pool_stats[name].attach(engines[name].sync_engine)
+        instrument_engine(engines[name].sync_engine, name)
+    replicas = ReplicaSet(
+        engines,
+        max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        eject_seconds=settings.DB_REPLICA_EJECT_SECONDS,
+        check_timeout=settings.DB_REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS,
+    )
+    registry.register_collector(replicas.collect)
+    registry.register_collector(labeled_stats_collector(
+        "db_replica_pool", "engine", lambda: {name: stats.snapshot() for name, stats in replica_pool_stats.items()}
+    ))
+    return replicas
+
+replicas = create_replica_set(settings.DATABASE_REPLICA_URIS)
 
-engine = create_async_engine(str(settings.DATABASE_URI), echo=False, future=True)
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=replicas,
     expire_on_commit=False,
     autoflush=False
 )
@@ -0,0 +1,29 @@
+
+from typing import Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+AfterCommit = Callable[[], Awaitable[None]]
+
+def after_commit(session: AsyncSession, callback: AfterCommit):
+    """Run `callback` once the session's current transaction commits via UnitOfWork.
+
+    Repositories use this for side effects (cache invalidation) that must not
+    happen before their writes are visible to other connections.
+    """
+    session.info.setdefault("after_commit", []).append(callback)
+
+class UnitOfWork:
+    """Request-scoped transaction: repositories only write to the session and
+    the service commits once at the end of each flow."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def commit(self):
+        await self.session.commit()
+        for callback in self.session.info.pop("after_commit", []):
+            await callback()
+
+    async def rollback(self):
+        await self.session.rollback()
+        self.session.info.pop("after_commit", None)
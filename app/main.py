@@ -1,29 +1,124 @@
 
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.logging import setup_logging
+from app.core.hashing import password_hasher
+from app.core.http import close_http_client
+from app.core.metrics import registry
+from app.core.security import key_ring
+from app.core.warmup import warmup
+from app.api.middleware import MetricsMiddleware
+from app.api.responses import FastJSONResponse
+from app.db.session import AsyncSessionLocal, engine, replicas
+from app.db.maintenance import run_maintenance_loop
+from app.services.outbox_worker import outbox_worker
+from app.services.token_epochs import token_epochs
 
 setup_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Set all CORS enabled origins
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ENABLED:
+        await warmup.run(
+            engine,
+            min(settings.WARMUP_DB_CONNECTIONS or settings.DB_POOL_SIZE, settings.DB_POOL_SIZE),
+            settings.WARMUP_TIMEOUT_SECONDS,
+        )
+    app.state.outbox_worker = outbox_worker
+    worker_task = None
+    if settings.EMAIL_OUTBOX_WORKER_ENABLED:
+        worker_task = asyncio.create_task(outbox_worker.run())
+    maintenance_task = None
+    if settings.OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0:
+        maintenance_task = asyncio.create_task(
+            run_maintenance_loop(
+                engine, AsyncSessionLocal, settings.OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS,
+                partitions=settings.OTP_STORE_BACKEND == "sql",
+            )
+        )
+    replica_task = None
+    if replicas and settings.DB_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS > 0:
+        replica_task = asyncio.create_task(
+            replicas.run_health_checks(settings.DB_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
+        )
+    # Revocations must be loaded before the first token is checked
+    try:
+        await token_epochs.refresh(AsyncSessionLocal)
+    except Exception:
+        logger.exception("Loading token revocations failed; retrying in the background")
+    revocation_task = asyncio.create_task(
+        token_epochs.run_refresh(AsyncSessionLocal, settings.TOKEN_REVOCATION_REFRESH_SECONDS)
     )
+    yield
+    # The server has stopped taking requests and waited for in-flight ones;
+    # stop the background work, then close every pooled connection.
+    tasks = [task for task in (maintenance_task, replica_task, revocation_task) if task is not None]
+    for task in tasks:
+        task.cancel()
+    if worker_task is not None:
+        outbox_worker.stop()
+        tasks.append(worker_task)
+    # Let them finish and return their pooled connections before disposing
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_http_client()
+    await engine.dispose()
+    await replicas.dispose()
+    password_hasher.shutdown()
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+def create_app() -> FastAPI:
+    """Build the application. Serve it with `uvicorn app.main:app`, or
+    `uvicorn --factory app.main:create_app` for a fresh instance."""
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
+    )
+
+    # Set all CORS enabled origins
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Added last so it wraps everything, including CORS preflights
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    @app.get("/health")
+    def health_check():
+        return {"status": "ok"}
+
+    if key_ring is not None:
+        jwks_headers = {
+            "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}, stale-while-revalidate={settings.JWKS_MAX_AGE_SECONDS}",
+            "ETag": key_ring.etag,
+        }
+
+        @app.get("/.well-known/jwks.json", include_in_schema=False)
+        def jwks(request: Request):
+            if request.headers.get("if-none-match") == key_ring.etag:
+                return Response(status_code=304, headers=jwks_headers)
+            return Response(key_ring.jwks, media_type="application/json", headers=jwks_headers)
+
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
 
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
+app = create_app()
@@ -1,17 +1,30 @@
 
 import uuid
-from sqlalchemy import Boolean, Column, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, String, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class OTP(Base):
     __tablename__ = "otps"
+    __table_args__ = (
+        # Matches OTPRepo's latest-valid lookup: equality on email/type, newest
+        # first, only unused codes, with expires_at checked from the index.
+        Index(
+            "ix_otps_active_lookup",
+            "email", "type", "created_at",
+            postgresql_include=["expires_at"],
+            postgresql_where=text("is_used = false"),
+        ),
+        # Daily range partitions; see app.db.otp_partitions for retention.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String, index=True, nullable=False)
+    email = Column(String, nullable=False)
     code = Column(String, nullable=False)
     type = Column(String, nullable=False) # register, reset_password
     expires_at = Column(DateTime(timezone=True), nullable=False)
-    is_used = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    is_used = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    # Part of the primary key because Postgres requires the partition key in it
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
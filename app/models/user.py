@@ -1,12 +1,21 @@
 
 import uuid
-from sqlalchemy import Boolean, Column, String, DateTime
+from sqlalchemy import Boolean, Column, String, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination order for listing/export
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Incremental reads of recent revocations
+        Index(
+            "ix_users_tokens_valid_after", "tokens_valid_after",
+            postgresql_where=text("tokens_valid_after IS NOT NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -16,3 +25,5 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Access tokens issued (iat) before this are revoked: logout-all, password reset
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)
@@ -1,38 +1,113 @@
 
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Row, bindparam, extract, func, lambda_stmt, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.db.prepared import PreparedQuery
 from app.models.otp import OTP
 
+_latest_valid_code = PreparedQuery(
+    select(OTP.code)
+    .where(
+        OTP.email == bindparam("email"),
+        OTP.type == bindparam("type"),
+        OTP.is_used == False,
+        OTP.expires_at > func.now()
+    )
+    .order_by(OTP.created_at.desc())
+    .limit(1)
+)
+
+# Ages computed by the database, so they don't depend on the app's clock or timezone
+_active_code = PreparedQuery(
+    select(
+        OTP.code,
+        extract("epoch", func.now() - OTP.created_at),
+        extract("epoch", OTP.expires_at - func.now()),
+    )
+    .where(
+        OTP.email == bindparam("email"),
+        OTP.type == bindparam("type"),
+        OTP.is_used == False,
+        OTP.expires_at > func.now()
+    )
+    .order_by(OTP.created_at.desc())
+    .limit(1)
+)
+
 class OTPRepo:
+    """OTP persistence. Methods don't commit; callers commit through UnitOfWork."""
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create_otp(self, email: str, code: str, type: str, expires_at: datetime) -> OTP:
+        # Inserted when the caller's unit of work commits
         db_otp = OTP(email=email, code=code, type=type, expires_at=expires_at)
         self.db.add(db_otp)
-        await self.db.commit()
-        await self.db.refresh(db_otp)
         return db_otp
 
-    async def get_latest_valid_otp(self, email: str, type: str) -> Optional[OTP]:
-        # Get the latest unused OTP that hasn't expired
-        result = await self.db.execute(
+    def _latest_valid(self, email: str, type: str):
+        return (
             select(OTP)
             .where(
                 OTP.email == email,
                 OTP.type == type,
                 OTP.is_used == False,
-                OTP.expires_at > datetime.utcnow()
+                OTP.expires_at > func.now()
             )
             .order_by(OTP.created_at.desc())
         )
+
+    async def get_latest_valid_otp(self, email: str, type: str) -> Optional[OTP]:
+        # Get the latest unused OTP that hasn't expired; like every OTP query,
+        # expiry is checked against the database clock
+        result = await self.db.execute(lambda_stmt(
+            lambda: select(OTP)
+            .where(OTP.email == email, OTP.type == type, OTP.is_used == False, OTP.expires_at > func.now())
+            .order_by(OTP.created_at.desc())
+        ))
         return result.scalars().first()
 
+    async def get_latest_valid_code(self, email: str, type: str) -> Optional[str]:
+        """Code of the latest valid OTP, for read-only checks."""
+        row = await _latest_valid_code.fetchrow(self.db, email=email, type=type)
+        return row[0] if row is not None else None
+
+    async def get_active_code(self, email: str, type: str) -> Optional[Row]:
+        """(code, seconds since created, seconds until expiry) of the latest valid OTP."""
+        return await _active_code.fetchrow(self.db, email=email, type=type)
+
+    async def extend_otp(self, email: str, type: str, code: str, expires_at: datetime) -> bool:
+        """Push a still-valid code's expiry out, so it can be sent again."""
+        result = await self.db.execute(
+            update(OTP)
+            .where(
+                OTP.email == email,
+                OTP.type == type,
+                OTP.code == code,
+                OTP.is_used == False,
+                OTP.expires_at > func.now()
+            )
+            .values(expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    async def consume_latest_valid_otp(self, email: str, type: str, code: str) -> bool:
+        # Check and mark used in one statement; the row lock makes concurrent
+        # consumers of the same code serialize, and only one sees is_used = false.
+        latest = self._latest_valid(email, type).with_only_columns(OTP.id).limit(1).with_for_update().scalar_subquery()
+        result = await self.db.execute(
+            update(OTP)
+            .where(OTP.id == latest, OTP.code == code, OTP.is_used == False)
+            .values(is_used=True)
+            .returning(OTP.id)
+        )
+        return result.first() is not None
+
     async def mark_as_used(self, otp: OTP) -> OTP:
         otp.is_used = True
         self.db.add(otp)
-        await self.db.commit()
-        await self.db.refresh(otp)
         return otp
@@ -0,0 +1,229 @@
+
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Protocol, Set, Tuple
+
+from app.repos.otp_repo import OTPRepo
+
+class ActiveOTP(NamedTuple):
+    code: str
+    # Seconds since the code was issued, and until it expires
+    age: float
+    remaining: float
+
+class OTPStore(ABC):
+    """Where one-time codes live. Only the latest code per (email, type) is valid."""
+
+    @abstractmethod
+    async def issue(self, email: str, type: str, code: str, expires_at: datetime):
+        """Store `code` as the latest one, replacing any earlier code."""
+
+    @abstractmethod
+    async def active(self, email: str, type: str) -> Optional[ActiveOTP]:
+        """The code that is currently valid, if any."""
+
+    @abstractmethod
+    async def extend(self, email: str, type: str, code: str, expires_at: datetime):
+        """Move the expiry of the active `code`, which stays the same."""
+
+    @abstractmethod
+    async def verify(self, email: str, type: str, code: str) -> bool:
+        """Check `code` without using it up."""
+
+    @abstractmethod
+    async def consume(self, email: str, type: str, code: str) -> bool:
+        """Atomically check `code` and mark it used; only one caller can win."""
+
+def _ttl_seconds(expires_at: datetime) -> float:
+    # OTP expiries are aware UTC (see app.utils.otp.get_otp_expiry)
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+class SQLOTPStore(OTPStore):
+    def __init__(self, otp_repo: OTPRepo):
+        self.otp_repo = otp_repo
+
+    async def issue(self, email: str, type: str, code: str, expires_at: datetime):
+        await self.otp_repo.create_otp(email, code, type, expires_at)
+
+    async def active(self, email: str, type: str) -> Optional[ActiveOTP]:
+        row = await self.otp_repo.get_active_code(email, type)
+        return ActiveOTP(row[0], float(row[1]), float(row[2])) if row is not None else None
+
+    async def extend(self, email: str, type: str, code: str, expires_at: datetime):
+        await self.otp_repo.extend_otp(email, type, code, expires_at)
+
+    async def verify(self, email: str, type: str, code: str) -> bool:
+        return await self.otp_repo.get_latest_valid_code(email, type) == code
+
+    async def consume(self, email: str, type: str, code: str) -> bool:
+        return await self.otp_repo.consume_latest_valid_otp(email, type, code)
+
+class TimerWheel:
+    """Hashed timer wheel: keys are bucketed by deadline tick and swept as time advances.
+
+    Deadlines further out than one revolution land in a slot that comes around
+    early; callers re-check the real deadline and reschedule those keys.
+    """
+
+    def __init__(self, now: float, tick: float = 1.0, slots: int = 1024):
+        self.tick = tick
+        self.slots: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self.current = int(now / tick)
+
+    def schedule(self, key: Hashable, deadline: float):
+        target = max(int(deadline / self.tick) + 1, self.current + 1)
+        self.slots[target % len(self.slots)].add(key)
+
+    def advance(self, now: float) -> List[Hashable]:
+        target = int(now / self.tick)
+        if target <= self.current:
+            return []
+        due: List[Hashable] = []
+        for t in range(self.current + 1, min(target, self.current + len(self.slots)) + 1):
+            slot = self.slots[t % len(self.slots)]
+            if slot:
+                due.extend(slot)
+                slot.clear()
+        self.current = target
+        return due
+
+class MemoryOTPStore(OTPStore):
+    """In-process store. Expiry runs on a timer wheel swept lazily on every call.
+
+    Check-and-consume has no await between the check and the delete, so it is
+    atomic on the event loop. Codes are per-process: use with a single worker
+    or sticky routing, or use a shared backend.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, tick: float = 1.0):
+        self.clock = clock
+        # (email, type) -> (code, deadline, issued)
+        self._entries: Dict[Tuple[str, str], Tuple[str, float, float]] = {}
+        self._wheel = TimerWheel(clock(), tick=tick)
+
+    def _sweep(self, now: float):
+        for key in self._wheel.advance(now):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry[1] <= now:
+                del self._entries[key]
+            else:
+                self._wheel.schedule(key, entry[1])
+
+    def _entry(self, email: str, type: str) -> Optional[Tuple[str, float, float]]:
+        now = self.clock()
+        self._sweep(now)
+        entry = self._entries.get((email, type))
+        if entry is None or entry[1] <= now:
+            return None
+        return entry
+
+    def _get(self, email: str, type: str) -> Optional[str]:
+        entry = self._entry(email, type)
+        return entry[0] if entry is not None else None
+
+    def _set(self, email: str, type: str, code: str, expires_at: datetime, issued: float):
+        deadline = self.clock() + _ttl_seconds(expires_at)
+        self._entries[(email, type)] = (code, deadline, issued)
+        self._wheel.schedule((email, type), deadline)
+
+    async def issue(self, email: str, type: str, code: str, expires_at: datetime):
+        now = self.clock()
+        self._sweep(now)
+        self._set(email, type, code, expires_at, now)
+
+    async def active(self, email: str, type: str) -> Optional[ActiveOTP]:
+        entry = self._entry(email, type)
+        if entry is None:
+            return None
+        now = self.clock()
+        return ActiveOTP(entry[0], now - entry[2], entry[1] - now)
+
+    async def extend(self, email: str, type: str, code: str, expires_at: datetime):
+        entry = self._entry(email, type)
+        if entry is not None and entry[0] == code:
+            self._set(email, type, code, expires_at, entry[2])
+
+    async def verify(self, email: str, type: str, code: str) -> bool:
+        return self._get(email, type) == code
+
+    async def consume(self, email: str, type: str, code: str) -> bool:
+        if self._get(email, type) != code:
+            return False
+        del self._entries[(email, type)]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class KeyValueClient(Protocol):
+    """The subset of the redis.asyncio client the key-value store needs."""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: str, px: int) -> object: ...
+
+    async def delete(self, *keys: str) -> int: ...
+
+class KeyValueOTPStore(OTPStore):
+    """Redis-style backend shared by all workers.
+
+    `otp:{type}:{email}` points at the latest code and `otp:{type}:{email}:{code}`
+    marks it unused. Consuming deletes the marker; DEL reports whether the key
+    existed, so exactly one concurrent consumer wins without needing a script.
+    The marker's value is "issued:expires" (epoch seconds).
+    """
+
+    def __init__(self, client: KeyValueClient, prefix: str = "otp", clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def _latest_key(self, email: str, type: str) -> str:
+        return f"{self.prefix}:{type}:{email}"
+
+    async def _set(self, email: str, type: str, code: str, expires_at: datetime, issued: float):
+        ttl = _ttl_seconds(expires_at)
+        px = max(int(ttl * 1000), 1)
+        latest_key = self._latest_key(email, type)
+        await self.client.set(f"{latest_key}:{code}", f"{issued}:{self.clock() + ttl}", px=px)
+        await self.client.set(latest_key, code, px=px)
+
+    async def issue(self, email: str, type: str, code: str, expires_at: datetime):
+        await self._set(email, type, code, expires_at, self.clock())
+
+    async def active(self, email: str, type: str) -> Optional[ActiveOTP]:
+        latest_key = self._latest_key(email, type)
+        latest = await self.client.get(latest_key)
+        if latest is None:
+            return None
+        code = _decode(latest)
+        marker = await self.client.get(f"{latest_key}:{code}")
+        if marker is None:
+            return None
+        issued, expires = map(float, _decode(marker).split(":"))
+        now = self.clock()
+        return ActiveOTP(code, now - issued, expires - now)
+
+    async def extend(self, email: str, type: str, code: str, expires_at: datetime):
+        active = await self.active(email, type)
+        if active is not None and active.code == code:
+            await self._set(email, type, code, expires_at, self.clock() - active.age)
+
+    async def verify(self, email: str, type: str, code: str) -> bool:
+        latest = await self.client.get(self._latest_key(email, type))
+        if latest is None or _decode(latest) != code:
+            return False
+        return await self.client.get(f"{self._latest_key(email, type)}:{code}") is not None
+
+    async def consume(self, email: str, type: str, code: str) -> bool:
+        latest_key = self._latest_key(email, type)
+        latest = await self.client.get(latest_key)
+        if latest is None or _decode(latest) != code:
+            return False
+        return await self.client.delete(f"{latest_key}:{code}") == 1
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,63 @@
+
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.email_outbox import EmailOutbox
+
+class OutboxRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def enqueue(self, email_to: str, subject: str, content: str) -> EmailOutbox:
+        # Not committed here: the job becomes visible together with whatever
+        # the caller commits next (e.g. the OTP it belongs to).
+        job = EmailOutbox(email_to=email_to, subject=subject, content=content)
+        self.db.add(job)
+        return job
+
+    async def claim_batch(self, limit: int) -> List[EmailOutbox]:
+        # Rows stay locked until the caller commits; other workers skip them.
+        result = await self.db.execute(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= func.now()
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    def mark_sent(self, job: EmailOutbox):
+        job.status = "sent"
+        job.sent_at = datetime.now(timezone.utc)
+        job.attempts += 1
+        job.last_error = None
+
+    def mark_failed(self, job: EmailOutbox, error: str, retry_at: Optional[datetime]):
+        job.attempts += 1
+        job.last_error = error
+        if retry_at is None:
+            job.status = "dead"
+        else:
+            job.next_attempt_at = retry_at
+
+    async def stats(self) -> dict:
+        result = await self.db.execute(
+            select(func.count(), func.min(EmailOutbox.created_at))
+            .where(EmailOutbox.status == "pending")
+        )
+        depth, oldest = result.one()
+        lag = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+        return {"depth": depth, "oldest_pending_age_seconds": max(lag, 0.0)}
+
+    async def purge(self, before: datetime) -> int:
+        """Delete sent and dead jobs queued before `before`; pending ones are kept."""
+        result = await self.db.execute(
+            delete(EmailOutbox)
+            .where(EmailOutbox.status.in_(("sent", "dead")), EmailOutbox.created_at < before)
+        )
+        return result.rowcount
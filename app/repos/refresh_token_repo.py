@@ -0,0 +1,84 @@
+
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Row, delete, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+class RefreshTokenRepo:
+    """Refresh token persistence. Methods don't commit; callers commit through UnitOfWork."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def add(self, user_id: uuid.UUID, family_id: uuid.UUID, token_hash: str, expires_at: datetime) -> RefreshToken:
+        token = RefreshToken(user_id=user_id, family_id=family_id, token_hash=token_hash, expires_at=expires_at)
+        self.db.add(token)
+        return token
+
+    async def use(self, token_hash: str) -> Optional[Row]:
+        """Mark a live token as used and return (user_id, family_id, email, is_active).
+
+        Lookup, owner fetch and the used mark are one UPDATE ... FROM users, so
+        of two concurrent refreshes with the same token only one gets a row.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now(),
+                RefreshToken.user_id == User.id,
+            )
+            .values(used_at=func.now())
+            .returning(RefreshToken.user_id, RefreshToken.family_id, User.email, User.is_active)
+            .execution_options(synchronize_session=False)
+        )
+        return (await self.db.execute(stmt)).first()
+
+    async def revoke_reused_family(self, token_hash: str) -> bool:
+        """If `token_hash` was already rotated, revoke every live token of its family.
+
+        A rotated token coming back means it was copied; whoever holds the
+        newest token of that family can no longer be trusted either.
+        """
+        family = (
+            select(RefreshToken.family_id)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.used_at.is_not(None))
+            .scalar_subquery()
+        )
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount > 0
+
+    async def revoke_all(self, user_id: uuid.UUID) -> int:
+        """Revoke every live refresh token of the user, e.g. on logout-all."""
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None), RefreshToken.used_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount
+
+    async def purge(self, before: datetime) -> int:
+        """Delete expired tokens, and used or revoked ones issued before `before`."""
+        stmt = delete(RefreshToken).where(
+            or_(
+                RefreshToken.expires_at < func.now(),
+                (RefreshToken.created_at < before)
+                & or_(RefreshToken.used_at.is_not(None), RefreshToken.revoked_at.is_not(None)),
+            )
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount
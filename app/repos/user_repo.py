@@ -1,32 +1,176 @@
 
-from typing import Optional
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import Row, Select, bindparam, lambda_stmt, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from app.core.principal_cache import principal_cache
+from app.db.prepared import PreparedQuery
+from app.db.routing import REPLICA
+from app.db.unit_of_work import after_commit
 from app.models.user import User
 from app.schemas.user import UserCreate
 
+def _filter_users(stmt: Select, provider: Optional[str], is_verified: Optional[bool], is_active: Optional[bool]) -> Select:
+    if provider is not None:
+        stmt = stmt.where(User.provider == provider)
+    if is_verified is not None:
+        stmt = stmt.where(User.is_verified == is_verified)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    return stmt
+
+class UserRow(NamedTuple):
+    """The columns read-only callers need, without an ORM object behind them."""
+    id: uuid.UUID
+    email: str
+    hashed_password: Optional[str]
+    provider: Optional[str]
+    is_active: bool
+    is_verified: bool
+
+_user_row_by_email = PreparedQuery(
+    select(*(getattr(User, name) for name in UserRow._fields)).where(User.email == bindparam("email"))
+)
+
 class UserRepo:
+    """User persistence. Methods don't commit; callers commit through UnitOfWork."""
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_user(self, user: UserCreate, hashed_password: str = None, provider: str = "email", is_verified: bool = False) -> User:
-        db_user = User(
-            email=user.email, 
-            hashed_password=hashed_password, 
+    async def create_user(self, user: UserCreate, hashed_password: str = None, provider: str = "email", is_verified: bool = False) -> Optional[User]:
+        # INSERT ... RETURNING hydrates the new row without a refresh round trip.
+        # Returns None when the email is already taken, including by a concurrent request.
+        stmt = (
+            insert(User)
+            .values(
+                email=user.email,
+                hashed_password=hashed_password,
+                provider=provider,
+                is_verified=is_verified
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
+        )
+        db_user = (await self.db.scalars(stmt)).first()
+        if db_user is not None:
+            after_commit(self.db, partial(principal_cache.invalidate, db_user.email))
+        return db_user
+
+    async def bulk_create_users(self, rows: List[dict]) -> Set[str]:
+        """Insert many users in one multi-row INSERT; returns the emails actually created.
+
+        Rows whose email already exists are skipped by ON CONFLICT.
+        """
+        if not rows:
+            return set()
+        stmt = (
+            insert(User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        return set((await self.db.scalars(stmt)).all())
+
+    async def get_or_create_oauth_user(self, email: str, provider: str) -> User:
+        # A single upsert instead of SELECT-then-INSERT, which races under
+        # concurrent first logins. The no-op update makes RETURNING yield the
+        # existing row on conflict.
+        stmt = insert(User).values(
+            email=email,
+            hashed_password=None,
             provider=provider,
-            is_verified=is_verified
+            is_verified=True
+        )
+        stmt = (
+            stmt.on_conflict_do_update(index_elements=[User.email], set_={"email": stmt.excluded.email})
+            .returning(User)
+            .execution_options(populate_existing=True)
         )
-        self.db.add(db_user)
-        await self.db.commit()
-        await self.db.refresh(db_user)
+        db_user = (await self.db.scalars(stmt)).one()
+        after_commit(self.db, partial(principal_cache.invalidate, db_user.email))
         return db_user
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
-        result = await self.db.execute(select(User).where(User.email == email))
+        # For callers that modify the user; read-only callers use get_user_row()
+        result = await self.db.execute(lambda_stmt(lambda: select(User).where(User.email == email)))
         return result.scalars().first()
 
+    async def get_user_row(self, email: str, replica: bool = False) -> Optional[UserRow]:
+        # replica=True only where a slightly stale row is acceptable
+        row = await _user_row_by_email.fetchrow(self.db, REPLICA if replica else None, email=email)
+        return UserRow(*row) if row is not None else None
+
     async def update_user(self, user: User) -> User:
+        # Changes are flushed as part of the commit
         self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        after_commit(self.db, partial(principal_cache.invalidate, user.email))
         return user
+
+    async def replace_password_hash(self, user_id: uuid.UUID, old_hash: str, new_hash: str) -> bool:
+        """Store a rehashed password, unless the hash changed meanwhile (e.g. a reset)."""
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def revoke_tokens(self, user_id: uuid.UUID) -> datetime:
+        """Revoke every access token issued to the user until now; returns the cutoff."""
+        now = datetime.now(timezone.utc)
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(tokens_valid_after=now)
+            .execution_options(synchronize_session=False)
+        )
+        return now
+
+    async def tokens_revoked_since(self, since: datetime) -> List[Row]:
+        """(email, tokens_valid_after) of users whose cutoff is later than `since`."""
+        stmt = (
+            select(User.email, User.tokens_valid_after)
+            .where(User.tokens_valid_after > since)
+            .order_by(User.tokens_valid_after)
+        )
+        return list((await self.db.execute(stmt)).all())
+
+    async def list_users(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None,
+        provider: Optional[str] = None,
+        is_verified: Optional[bool] = None,
+        is_active: Optional[bool] = None,
+    ) -> List[User]:
+        """One page in (created_at, id) order, starting after the `after` key.
+
+        Keyset pagination walks ix_users_created_at_id, so every page costs the
+        same no matter how deep it is (unlike OFFSET).
+        """
+        stmt = _filter_users(select(User), provider, is_verified, is_active)
+        if after is not None:
+            stmt = stmt.where(tuple_(User.created_at, User.id) > tuple_(*after))
+        stmt = stmt.order_by(User.created_at, User.id).limit(limit)
+        return list((await self.db.scalars(stmt, bind_arguments=REPLICA)).all())
+
+    async def stream_users(
+        self,
+        provider: Optional[str] = None,
+        is_verified: Optional[bool] = None,
+        is_active: Optional[bool] = None,
+        fetch_size: int = 1000,
+    ) -> AsyncIterator[Row]:
+        """All matching users as plain rows, read through a server-side cursor
+        `fetch_size` rows at a time."""
+        stmt = select(User.id, User.email, User.provider, User.is_active, User.is_verified, User.created_at)
+        stmt = _filter_users(stmt, provider, is_verified, is_active).order_by(User.created_at, User.id)
+        result = await self.db.stream(stmt.execution_options(yield_per=fetch_size), bind_arguments=REPLICA)
+        async for row in result:
+            yield row
@@ -1,6 +1,10 @@
 
-from typing import Optional
-from pydantic import BaseModel, EmailStr, UUID4
+import re
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, UUID4, model_validator
+
+BCRYPT_HASH_RE = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -8,6 +12,20 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserImportRow(UserCreate):
+    """One row of a bulk import: a plain password to hash, or an existing bcrypt hash."""
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+    is_verified: bool = False
+
+    @model_validator(mode="after")
+    def check_password(self) -> "UserImportRow":
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError("exactly one of password or hashed_password is required")
+        if self.hashed_password is not None and not BCRYPT_HASH_RE.match(self.hashed_password):
+            raise ValueError("hashed_password is not a bcrypt hash")
+        return self
+
 class UserLogin(UserBase):
     password: str
 
@@ -25,6 +43,15 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserAdminResponse(UserResponse):
+    provider: Optional[str] = None
+    created_at: datetime
+
+class UserPage(BaseModel):
+    items: List[UserAdminResponse]
+    # Pass back as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
 class OTPVerify(BaseModel):
     email: EmailStr
     otp: str
@@ -0,0 +1,203 @@
+"""Production server.
+
+    python -m app.serve
+
+Runs `app.main` on uvloop and httptools across SERVER_WORKERS processes. On
+SIGTERM each worker stops accepting connections, finishes in-flight requests
+for up to SERVER_GRACEFUL_SHUTDOWN_SECONDS and then runs the lifespan shutdown.
+"""
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.serve")
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+def worker_settings(workers: int, cpus: int) -> Dict[str, int]:
+    """Per-worker overrides so N workers together stay within the shared limits."""
+    overrides = {}
+    if settings.DB_CONNECTION_BUDGET is not None:
+        share = max(settings.DB_CONNECTION_BUDGET // workers, 1)
+        pool_size = min(settings.DB_POOL_SIZE, share)
+        overrides["DB_POOL_SIZE"] = pool_size
+        overrides["DB_MAX_OVERFLOW"] = share - pool_size
+    if settings.PASSWORD_HASH_WORKERS is None:
+        # Otherwise every worker would start a hashing process per CPU
+        overrides["PASSWORD_HASH_WORKERS"] = max(cpus // workers, 1)
+    return overrides
+
+def apply(overrides: Dict[str, int]):
+    # Through the environment as well, so spawned workers see them
+    for name, value in overrides.items():
+        os.environ[name] = str(value)
+        setattr(settings, name, value)
+
+def server_options() -> dict:
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_SECONDS,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+    }
+
+def restart_delay(fast_failures: int, base: float, cap: float = 30.0) -> float:
+    """No delay after a worker that ran a while, then base, 2*base, ... capped at `cap`."""
+    if fast_failures == 0:
+        return 0.0
+    return min(base * (2 ** (fast_failures - 1)), cap)
+
+class PreforkSupervisor:
+    """Forks workers from a process that has already imported the app.
+
+    Workers share the listening socket and the imported modules (copy on write).
+    Nothing at import time opens connections or threads; each worker's lifespan
+    does that after the fork. A worker that dies is replaced, with a growing delay
+    while workers keep dying soon after they start; after too many such failures
+    in a row the others are stopped and run() returns 1. SIGTERM/SIGINT are
+    passed on to the workers, which drain before exiting.
+    """
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.children: Dict[int, int] = {}
+        self.started_at: Dict[int, float] = {}
+        # slot -> when to start its replacement
+        self.restarts: Dict[int, float] = {}
+        self.fast_failures = 0
+        self.failed = False
+        self.stopping = False
+
+    def _spawn(self, slot: int, sockets: List):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                server = uvicorn.Server(self.config)
+                server.run(sockets=sockets)
+                if not server.started:
+                    # Lifespan startup failed; uvicorn returns without raising
+                    code = 3
+            except BaseException:
+                logger.exception("Worker %s crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = slot
+        self.started_at[pid] = time.monotonic()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self, pid: int, status: int):
+        slot = self.children.pop(pid, None)
+        started_at = self.started_at.pop(pid, 0.0)
+        if slot is None or self.stopping:
+            return
+        if time.monotonic() - started_at < settings.SERVER_FAST_FAILURE_SECONDS:
+            self.fast_failures += 1
+        else:
+            self.fast_failures = 0
+        if 0 < settings.SERVER_MAX_FAST_FAILURES <= self.fast_failures:
+            logger.error(
+                "Worker %s exited with status %s; %s workers in a row died right after starting, giving up",
+                pid, status, self.fast_failures,
+            )
+            self.failed = True
+            self._stop(None, None)
+            return
+        delay = restart_delay(self.fast_failures, settings.SERVER_RESTART_BACKOFF_SECONDS)
+        logger.warning("Worker %s exited with status %s; restarting in %.1fs", pid, status, delay)
+        self.restarts[slot] = time.monotonic() + delay
+
+    def _start_due(self, sockets: List):
+        now = time.monotonic()
+        for slot, due in list(self.restarts.items()):
+            if due <= now:
+                del self.restarts[slot]
+                self._spawn(slot, sockets)
+
+    def run(self) -> int:
+        sock = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self._spawn(slot, [sock])
+        logger.info("Started %s preloaded workers", self.workers)
+        deadline: Optional[float] = None
+        while self.children or (self.restarts and not self.stopping):
+            if self.stopping and deadline is None:
+                deadline = time.monotonic() + settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS + 5
+            if not self.stopping:
+                self._start_due([sock])
+            pid = 0
+            if self.children:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+            if pid == 0:
+                if deadline is not None and time.monotonic() > deadline:
+                    logger.warning("Workers did not drain in time; killing them")
+                    for child in self.children:
+                        try:
+                            os.kill(child, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+                time.sleep(0.1)
+                continue
+            self._reap(pid, status)
+        sock.close()
+        return 1 if self.failed else 0
+
+def main() -> int:
+    cpus = available_cpus()
+    workers = settings.SERVER_WORKERS or cpus
+    apply(worker_settings(workers, cpus))
+
+    if workers > 1 and settings.SERVER_PRELOAD:
+        if not hasattr(os, "fork"):
+            sys.exit("SERVER_PRELOAD needs a platform with fork()")
+        from app.main import create_app
+        return PreforkSupervisor(uvicorn.Config(create_app(), **server_options()), workers).run()
+    # Without preloading, uvicorn's own supervisor spawns workers that each import the app
+    uvicorn.run("app.main:create_app", factory=True, workers=workers, **server_options())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,70 @@
 
-from datetime import timedelta
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import HTTPException, status
+from app.core.config import settings
 from app.models.user import User
 from app.repos.user_repo import UserRepo
-from app.repos.otp_repo import OTPRepo
+from app.repos.refresh_token_repo import RefreshTokenRepo
+from app.repos.otp_store import OTPStore
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.schemas.token import Token
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.utils.otp import generate_otp, get_otp_expiry
+from app.core.security import create_access_token, generate_refresh_token, hash_refresh_token
+from app.core.hashing import password_hasher
+from app.core.metrics import auth_operation_duration, registry, timed
+from app.db.unit_of_work import UnitOfWork
+from app.utils.otp import OTP_EXPIRE_MINUTES, generate_otp, get_otp_expiry
 from app.services.email_service import EmailService
+from app.services.google_oauth import GoogleOAuthClient
+from app.services.token_epochs import token_epochs
+
+bcrypt_time = auth_operation_duration.labels("bcrypt")
+jwt_time = auth_operation_duration.labels("jwt")
+email_time = auth_operation_duration.labels("email")
+
+otp_issues = registry.counter(
+    "otp_issues_total",
+    "OTP requests: issued (new code), resent (active code sent again), suppressed (debounced, nothing written or sent)",
+    ("outcome",),
+)
+
+logger = logging.getLogger(__name__)
 
 class AuthService:
-    def __init__(self, user_repo: UserRepo, otp_repo: OTPRepo, email_service: EmailService):
+    def __init__(self, user_repo: UserRepo, otp_store: OTPStore, email_service: EmailService, uow: UnitOfWork, google_oauth: GoogleOAuthClient, refresh_token_repo: RefreshTokenRepo):
         self.user_repo = user_repo
-        self.otp_repo = otp_repo
+        self.otp_store = otp_store
         self.email_service = email_service
+        self.google_oauth = google_oauth
+        self.refresh_token_repo = refresh_token_repo
+        # Each flow below commits exactly once, at the end
+        self.uow = uow
 
     async def register(self, user_in: UserCreate) -> UserResponse:
-        existing_user = await self.user_repo.get_user_by_email(user_in.email)
+        existing_user = await self.user_repo.get_user_row(user_in.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
-        hashed_password = get_password_hash(user_in.password)
+        with timed(bcrypt_time):
+            hashed_password = await password_hasher.hash(user_in.password)
         
         user = await self.user_repo.create_user(user_in, hashed_password)
-        
-        # Generate and send OTP
-        otp_code = generate_otp()
-        expiry = get_otp_expiry()
-        await self.otp_repo.create_otp(user.email, otp_code, "register", expiry)
-        await self.email_service.send_otp_email(user.email, otp_code, "Registration")
-        
+        if user is None:
+            # Lost a race with a concurrent registration for the same email
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+
+        # Send an OTP; user, OTP and email job are committed together
+        await self._send_otp(user.email, "register", "Registration")
+        await self.uow.commit()
+
         return user
 
     async def verify_registration(self, email: str, otp: str) -> bool:
@@ -41,22 +72,24 @@ class AuthService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        valid_otp = await self.otp_repo.get_latest_valid_otp(email, "register")
-        if not valid_otp or valid_otp.code != otp:
+        # Checks the OTP and marks it as used in one step
+        if not await self.otp_store.consume(email, "register", otp):
              raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-        
-        # Mark OTP as used
-        await self.otp_repo.mark_as_used(valid_otp)
-        
+
         # Verify user
         user.is_verified = True
         user.is_active = True # Ensure active
         await self.user_repo.update_user(user)
+        await self.uow.commit()
         return True
 
     async def login(self, user_in: UserLogin) -> Token:
-        user = await self.user_repo.get_user_by_email(user_in.email)
-        if not user or not verify_password(user_in.password, user.hashed_password):
+        user = await self.user_repo.get_user_row(user_in.email)
+        password_ok, new_hash = False, None
+        if user is not None:
+            with timed(bcrypt_time):
+                password_ok, new_hash = await password_hasher.verify_and_update(user_in.password, user.hashed_password)
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -68,100 +101,118 @@ class AuthService:
         if not user.is_verified:
             raise HTTPException(status_code=400, detail="User not verified. Please verify your email.")
 
-        access_token_expires = timedelta(minutes=30)
-        access_token = create_access_token(
-            subject=user.email, expires_delta=access_token_expires
+        if new_hash is not None:
+            # Hashed under an older policy (scheme or cost); committed with the tokens
+            await self.user_repo.replace_password_hash(user.id, user.hashed_password, new_hash)
+        return await self._issue_tokens(user.id, user.email)
+
+    async def _issue_tokens(self, user_id: uuid.UUID, email: str, family_id: Optional[uuid.UUID] = None) -> Token:
+        """Access token plus a new refresh token; commits the unit of work."""
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        with timed(jwt_time):
+            access_token = create_access_token(
+                subject=email, expires_delta=access_token_expires
+            )
+        refresh_token = generate_refresh_token()
+        self.refresh_token_repo.add(
+            user_id,
+            family_id or uuid.uuid4(),
+            hash_refresh_token(refresh_token),
+            datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
         )
-        return Token(access_token=access_token, token_type="bearer")
+        await self.uow.commit()
+        return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
+
+    async def refresh(self, refresh_token: str) -> Token:
+        # No password hashing here: one indexed UPDATE marks the token used
+        # and returns its owner, then the replacement is inserted on commit.
+        token_hash = hash_refresh_token(refresh_token)
+        row = await self.refresh_token_repo.use(token_hash)
+        if row is None:
+            if await self.refresh_token_repo.revoke_reused_family(token_hash):
+                await self.uow.commit()
+                logger.warning("Refresh token reused; revoked its token family")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if not row.is_active:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        return await self._issue_tokens(row.user_id, row.email, row.family_id)
 
     async def forgot_password(self, email: str):
-        user = await self.user_repo.get_user_by_email(email)
+        user = await self.user_repo.get_user_row(email)
         if not user:
              return 
 
-        otp_code = generate_otp()
-        expiry = get_otp_expiry()
-        await self.otp_repo.create_otp(email, otp_code, "reset_password", expiry)
-        await self.email_service.send_otp_email(email, otp_code, "Password Reset")
+        if await self._send_otp(email, "reset_password", "Password Reset"):
+            await self.uow.commit()
+
+    async def _send_otp(self, email: str, type: str, label: str) -> bool:
+        """Email a code, reusing the active one when it is recent; False if suppressed.
+
+        Every send sets the expiry to a full lifetime from now, so the time
+        since the last email is that lifetime minus what remains.
+        """
+        active = await self.otp_store.active(email, type)
+        if active is not None and OTP_EXPIRE_MINUTES * 60 - active.remaining < settings.OTP_EMAIL_DEBOUNCE_SECONDS:
+            otp_issues.labels("suppressed").inc()
+            return False
+        if active is not None and active.age < settings.OTP_RESEND_WINDOW_SECONDS:
+            otp_code = active.code
+            await self.otp_store.extend(email, type, otp_code, get_otp_expiry())
+            otp_issues.labels("resent").inc()
+        else:
+            otp_code = generate_otp()
+            await self.otp_store.issue(email, type, otp_code, get_otp_expiry())
+            otp_issues.labels("issued").inc()
+        with timed(email_time):
+            await self.email_service.queue_otp_email(email, otp_code, label)
+        return True
 
     async def verify_reset_password_otp(self, email: str, otp: str) -> bool:
          # Just verifies the OTP is valid, does not reset yet. 
          # Used if the UI wants to show a "valid OTP" state before asking for new password
-         valid_otp = await self.otp_repo.get_latest_valid_otp(email, "reset_password")
-         if not valid_otp or valid_otp.code != otp:
+         if not await self.otp_store.verify(email, "reset_password", otp):
              raise HTTPException(status_code=400, detail="Invalid or expired OTP")
          return True
 
     async def reset_password(self, email: str, otp: str, new_password: str):
-        valid_otp = await self.otp_repo.get_latest_valid_otp(email, "reset_password")
-        if not valid_otp or valid_otp.code != otp:
-             raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-        
         user = await self.user_repo.get_user_by_email(email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-            
-        
-        await self.otp_repo.mark_as_used(valid_otp)
+
+        if not await self.otp_store.consume(email, "reset_password", otp):
+             raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+
+        with timed(bcrypt_time):
+            user.hashed_password = await password_hasher.hash(new_password)
+        await self.user_repo.update_user(user)
+        # Whoever knew the old password may hold tokens; they all stop working
+        epoch = await self.user_repo.revoke_tokens(user.id)
+        await self.refresh_token_repo.revoke_all(user.id)
+        await self.uow.commit()
+        token_epochs.revoke(email, epoch)
+
+    async def logout_all(self, user_id: uuid.UUID, email: str):
+        """Revoke every access and refresh token the user holds."""
+        epoch = await self.user_repo.revoke_tokens(user_id)
+        await self.refresh_token_repo.revoke_all(user_id)
+        await self.uow.commit()
+        token_epochs.revoke(email, epoch)
 
     async def google_login(self, code: str) -> Token:
-        import httpx
-        from app.core.config import settings
-        
-        # 1. Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            try:
-                data = {
-                    "code": code,
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-                    "grant_type": "authorization_code",
-                }
-                response = await client.post("https://oauth2.googleapis.com/token", data=data)
-                response.raise_for_status()
-                token_data = response.json()
-                access_token = token_data["access_token"]
-                
-                # 2. Get user info
-                headers = {"Authorization": f"Bearer {access_token}"}
-                user_info_response = await client.get("https://www.googleapis.com/oauth2/v2/userinfo", headers=headers)
-                user_info_response.raise_for_status()
-                user_info = user_info_response.json()
-                email = user_info["email"]
-            except httpx.HTTPError as e:
-                 raise HTTPException(status_code=400, detail=f"Google OAuth Error: {str(e)}")
-
-        # 3. Check if user exists
-        user = await self.user_repo.get_user_by_email(email)
-        
-        if not user:
-            # Create new user
-            # We use a dummy password or handle it in repo (we made it nullable)
-            # Schema expects password, so we construct UserCreate with empty string but pass None to repo?
-            # UserCreate Pydantic model requires password. We should probably adjust the schema or just pass a dummy one.
-            # Ideally we separate Schema for DB creation vs API input.
-            # For now, let's create a ephemeral UserCreate. 
-            user_in = UserCreate(email=email, password="") 
-            user = await self.user_repo.create_user(
-                user_in, 
-                hashed_password=None, 
-                provider="google", 
-                is_verified=True
-            )
-        else:
-            # If user exists but provider is email, we might want to link or just allow logging in.
-            # Security Note: If email is not verified in Google, this could be a risk. 
-            # But Google emails are generally trusted if verified: True in response.
-            # user_info.get("verified_email") check is good practice.
-            pass
-            
+        # 1. Exchange the code and verify the returned id_token against Google's keys
+        claims = await self.google_oauth.authenticate(code)
+        email = claims["email"]
+
+        # 2. Get or create the user in one statement.
+        # If the user exists with provider "email" we just log them in;
+        # authenticate() has already rejected unverified Google emails.
+        user = await self.user_repo.get_or_create_oauth_user(email, provider="google")
         if not user.is_active:
              raise HTTPException(status_code=400, detail="Inactive user")
 
-        # 4. Create JWT
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            subject=user.email, expires_delta=access_token_expires
-        )
-        return Token(access_token=access_token, token_type="bearer")
+        # 3. Issue tokens; commits the new user and refresh token together
+        return await self._issue_tokens(user.id, user.email)
@@ -1,10 +1,15 @@
 
+from typing import Optional
 from app.core.config import settings
+from app.repos.outbox_repo import OutboxRepo
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EmailService:
+    def __init__(self, outbox_repo: Optional[OutboxRepo] = None):
+        self.outbox_repo = outbox_repo
+
     async def send_email(self, email_to: str, subject: str, content: str):
         # In a real application, you would use an SMTP server or an email API like SendGrid/SES
         logger.info(f"Sending email to {email_to} with subject '{subject}'")
@@ -15,7 +20,19 @@ class EmailService:
         print(f"Content: {content}")
         print(f"------------------")
 
-    async def send_otp_email(self, email_to: str, otp: str, type: str):
+    def _render_otp_email(self, otp: str, type: str) -> tuple[str, str]:
         subject = f"Your OTP for {type} - {settings.PROJECT_NAME}"
         content = f"Your OTP is: {otp}. It expires in {settings.ACCESS_TOKEN_EXPIRE_MINUTES} minutes."
+        return subject, content
+
+    async def send_otp_email(self, email_to: str, otp: str, type: str):
+        subject, content = self._render_otp_email(otp, type)
         await self.send_email(email_to, subject, content)
+
+    async def queue_otp_email(self, email_to: str, otp: str, type: str):
+        """Add the OTP email to the outbox; it is delivered by the outbox worker once committed."""
+        if self.outbox_repo is None:
+            await self.send_otp_email(email_to, otp, type)
+            return
+        subject, content = self._render_otp_email(otp, type)
+        self.outbox_repo.enqueue(email_to, subject, content)
@@ -0,0 +1,164 @@
+
+import asyncio
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import registry, stats_collector
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+def _max_age(cache_control: Optional[str], default: float) -> float:
+    match = MAX_AGE_RE.search(cache_control or "")
+    return float(match.group(1)) if match else default
+
+class JWKSCache:
+    """Google's signing keys, parsed once and kept until the response's max-age.
+
+    An unknown `kid` forces a refresh (Google rotated keys), but at most once per
+    `min_refresh_interval` so garbage tokens can't make us hammer the endpoint.
+    Concurrent refreshes are coalesced into one request.
+    """
+
+    def __init__(
+        self,
+        jwks_uri: str,
+        http_client: Callable[[], httpx.AsyncClient] = get_http_client,
+        default_ttl: float = 3600.0,
+        min_refresh_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.jwks_uri = jwks_uri
+        self.http_client = http_client
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.clock = clock
+        self.keys: Dict[str, Key] = {}
+        self.fetched_at = float("-inf")
+        self.expires_at = float("-inf")
+        self.refreshes = 0
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self, requested_at: float):
+        async with self._lock:
+            if self.fetched_at >= requested_at:
+                return  # a concurrent caller already refreshed
+            response = await self.http_client().get(self.jwks_uri)
+            response.raise_for_status()
+            keys = {}
+            for key in response.json().get("keys", []):
+                if key.get("kty") == "RSA" and "kid" in key:
+                    keys[key["kid"]] = jwk.construct(key, algorithm="RS256")
+            self.keys = keys
+            self.fetched_at = self.clock()
+            self.expires_at = self.fetched_at + _max_age(response.headers.get("cache-control"), self.default_ttl)
+            self.refreshes += 1
+
+    async def ensure_fresh(self):
+        now = self.clock()
+        if now >= self.expires_at:
+            await self._refresh(now)
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Key]:
+        await self.ensure_fresh()
+        key = self.keys.get(kid)
+        now = self.clock()
+        if key is None and now - self.fetched_at >= self.min_refresh_interval:
+            await self._refresh(now)
+            key = self.keys.get(kid)
+        return key
+
+    def stats(self) -> dict:
+        return {"keys": len(self.keys), "refreshes": self.refreshes}
+
+class GoogleOAuthClient:
+    """Authorization-code exchange plus local verification of the returned id_token.
+
+    The id_token already carries the verified email, so there is no userinfo call.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        redirect_uri: Optional[str],
+        token_uri: str,
+        issuers: List[str],
+        jwks: JWKSCache,
+        http_client: Callable[[], httpx.AsyncClient] = get_http_client,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.token_uri = token_uri
+        self.issuers = issuers
+        self.jwks = jwks
+        self.http_client = http_client
+
+    async def exchange_code(self, code: str) -> dict:
+        data = {
+            "code": code,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "redirect_uri": self.redirect_uri,
+            "grant_type": "authorization_code",
+        }
+        response = await self.http_client().post(self.token_uri, data=data)
+        response.raise_for_status()
+        return response.json()
+
+    async def verify_id_token(self, id_token: str, access_token: Optional[str] = None) -> dict:
+        try:
+            header = jwt.get_unverified_header(id_token)
+            if header.get("alg") != "RS256":
+                raise JWTError("Unexpected signing algorithm")
+            key = await self.jwks.get_key(header.get("kid"))
+            if key is None:
+                raise JWTError("Unknown signing key")
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                issuer=self.issuers,
+                access_token=access_token,
+            )
+        except JWTError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid Google ID token: {str(e)}",
+            )
+        if not claims.get("email") or not claims.get("email_verified"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Google account email is not verified",
+            )
+        return claims
+
+    async def authenticate(self, code: str) -> dict:
+        """Exchange `code` and return the verified id_token claims."""
+        try:
+            # On a cold or expired key cache, fetch the keys while the code is exchanged
+            token_data, _ = await asyncio.gather(self.exchange_code(code), self.jwks.ensure_fresh())
+            if "id_token" not in token_data:
+                raise HTTPException(status_code=400, detail="Google OAuth Error: no id_token returned")
+            return await self.verify_id_token(token_data["id_token"], token_data.get("access_token"))
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=400, detail=f"Google OAuth Error: {str(e)}")
+
+google_oauth = GoogleOAuthClient(
+    client_id=settings.GOOGLE_CLIENT_ID,
+    client_secret=settings.GOOGLE_CLIENT_SECRET,
+    redirect_uri=settings.GOOGLE_REDIRECT_URI,
+    token_uri=settings.GOOGLE_TOKEN_URI,
+    issuers=settings.GOOGLE_ISSUERS,
+    jwks=JWKSCache(settings.GOOGLE_JWKS_URI, default_ttl=settings.GOOGLE_JWKS_DEFAULT_TTL_SECONDS),
+)
+registry.register_collector(stats_collector("google_jwks", google_oauth.jwks.stats))
@@ -0,0 +1,139 @@
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Histogram, registry, stats_collector
+from app.db.session import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.repos.outbox_repo import OutboxRepo
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+def retry_delay(attempts: int, base: float, cap: float = 3600.0) -> float:
+    """Exponential backoff: base, 2*base, 4*base, ... capped at `cap` seconds."""
+    return min(base * (2 ** max(attempts - 1, 0)), cap)
+
+class OutboxWorker:
+    """Delivers queued emails in batches claimed with SELECT ... FOR UPDATE SKIP LOCKED,
+    so any number of workers can poll the same outbox table."""
+
+    def __init__(
+        self,
+        session_factory,
+        email_service: Optional[EmailService] = None,
+        batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE,
+        concurrency: int = settings.EMAIL_OUTBOX_CONCURRENCY,
+        poll_interval: float = settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS,
+        max_attempts: int = settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        backoff: float = settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+        retention_days: int = settings.EMAIL_OUTBOX_RETENTION_DAYS,
+        purge_interval: float = settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.email_service = email_service or EmailService()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.retention_days = retention_days
+        self.purge_interval = purge_interval
+        self._stopping = asyncio.Event()
+        self._next_purge = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+        self.depth = 0
+        self.oldest_pending_age = 0.0
+        self.purged = 0
+        self.delivery_lag = Histogram(LAG_BUCKETS)
+
+    async def _deliver(self, job: EmailOutbox, semaphore: asyncio.Semaphore) -> Optional[Exception]:
+        async with semaphore:
+            try:
+                await self.email_service.send_email(job.email_to, job.subject, job.content)
+            except Exception as e:
+                return e
+        return None
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as session:
+            repo = OutboxRepo(session)
+            jobs = await repo.claim_batch(self.batch_size)
+            if jobs:
+                semaphore = asyncio.Semaphore(self.concurrency)
+                errors = await asyncio.gather(*(self._deliver(job, semaphore) for job in jobs))
+                now = datetime.now(timezone.utc)
+                for job, error in zip(jobs, errors):
+                    if error is None:
+                        repo.mark_sent(job)
+                        self.sent += 1
+                        self.delivery_lag.observe((now - job.created_at).total_seconds())
+                        continue
+                    logger.warning(f"Email to {job.email_to} failed (attempt {job.attempts + 1}): {error}")
+                    if job.attempts + 1 >= self.max_attempts:
+                        repo.mark_failed(job, str(error), None)
+                        self.dead += 1
+                    else:
+                        delay = retry_delay(job.attempts + 1, self.backoff)
+                        repo.mark_failed(job, str(error), now + timedelta(seconds=delay))
+                        self.failed += 1
+            stats = await repo.stats()
+            self.depth = stats["depth"]
+            self.oldest_pending_age = stats["oldest_pending_age_seconds"]
+            await session.commit()
+        return len(jobs)
+
+    async def purge(self) -> int:
+        before = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        async with self.session_factory() as session:
+            purged = await OutboxRepo(session).purge(before)
+            await session.commit()
+        self.purged += purged
+        return purged
+
+    async def run(self):
+        # A fresh event per run: the worker outlives the event loop it last ran on
+        self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Email outbox poll failed")
+                claimed = 0
+            if self.purge_interval > 0 and time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                try:
+                    await self.purge()
+                except Exception:
+                    logger.exception("Email outbox purge failed")
+            if claimed < self.batch_size:
+                # A full batch means there is probably more work; poll again immediately.
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "dead": self.dead,
+            "depth": self.depth,
+            "oldest_pending_age_seconds": self.oldest_pending_age,
+            "purged": self.purged,
+            "delivery_lag_seconds": self.delivery_lag.snapshot(),
+        }
+
+outbox_worker = OutboxWorker(AsyncSessionLocal)
+registry.register_collector(stats_collector("email_outbox", outbox_worker.stats))
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry, stats_collector
+from app.repos.user_repo import UserRepo
+
+logger = logging.getLogger(__name__)
+
+class TokenEpochs:
+    """Per-user revocation cutoffs: access tokens whose `iat` is earlier are rejected.
+
+    Checking a token is a dict lookup. Only cutoffs younger than the access
+    token lifetime are kept, since an older one can only reject tokens that
+    have expired anyway, so the map stays as small as the recent revocations.
+    Revocations made by this process apply at once; those made by other
+    workers arrive with refresh(), which reads only cutoffs set since the
+    previous refresh (less `overlap`, for transactions that committed late).
+    """
+
+    def __init__(self, lifetime: float, overlap: float = 30.0, clock: Callable[[], float] = time.time):
+        self.lifetime = lifetime
+        self.overlap = overlap
+        self.clock = clock
+        self._epochs: Dict[str, float] = {}
+        self._last_refresh: Optional[float] = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def revoked(self, sub: Optional[str], iat: Optional[float]) -> bool:
+        epoch = self._epochs.get(sub)
+        # Tokens from before `iat` was added carry none; they count as oldest
+        return epoch is not None and (iat or 0.0) < epoch
+
+    def revoke(self, email: str, epoch: datetime):
+        timestamp = epoch.timestamp()
+        if timestamp > self._epochs.get(email, 0.0):
+            self._epochs[email] = timestamp
+
+    def _prune(self):
+        horizon = self.clock() - self.lifetime
+        for email in [email for email, epoch in self._epochs.items() if epoch < horizon]:
+            del self._epochs[email]
+
+    async def refresh(self, session_factory):
+        now = self.clock()
+        since = now - self.lifetime
+        if self._last_refresh is not None:
+            since = max(since, self._last_refresh - self.overlap)
+        async with session_factory() as session:
+            rows = await UserRepo(session).tokens_revoked_since(datetime.fromtimestamp(since, timezone.utc))
+        for email, epoch in rows:
+            self.revoke(email, epoch)
+        self._last_refresh = now
+        self._prune()
+        self.refreshes += 1
+
+    async def run_refresh(self, session_factory, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(session_factory)
+            except Exception:
+                self.refresh_errors += 1
+                logger.exception("Refreshing token revocations failed")
+
+    def clear(self):
+        self._epochs.clear()
+        self._last_refresh = None
+
+    def stats(self) -> dict:
+        return {"entries": len(self._epochs), "refreshes": self.refreshes, "refresh_errors": self.refresh_errors}
+
+token_epochs = TokenEpochs(lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+registry.register_collector(stats_collector("token_epochs", token_epochs.stats))
@@ -0,0 +1,139 @@
+
+import asyncio
+import csv
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.hashing import password_hasher
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserImportRow
+
+logger = logging.getLogger(__name__)
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        # loc + msg only: the input may contain the password
+        return "; ".join(
+            f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in error.errors()
+        )
+    return str(error)
+
+class UserImportService:
+    """Bulk user creation from a line stream (NDJSON or CSV with a header row).
+
+    Rows are validated as they arrive and written in batches of `batch_size`,
+    one INSERT and one commit per batch, so memory depends on the batch size and
+    not on the upload. Yields one result per input row in order, then a summary.
+    """
+
+    def __init__(self, user_repo: UserRepo, uow: UnitOfWork, batch_size: int, hash_concurrency: Optional[int] = None):
+        self.user_repo = user_repo
+        self.uow = uow
+        self.batch_size = batch_size
+        # Leave the rest of the hashing pool's queue to interactive logins
+        self._hash_slots = asyncio.Semaphore(hash_concurrency or password_hasher.workers)
+
+    async def _parse(self, lines: AsyncIterator[Optional[str]], format: str) -> AsyncIterator[Tuple[int, Optional[UserImportRow], Optional[str]]]:
+        header = None
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if line is None:
+                yield line_no, None, "line too long"
+                continue
+            if not line.strip():
+                continue
+            try:
+                if format == "csv":
+                    values = next(csv.reader([line]))
+                    if header is None:
+                        header = [name.strip() for name in values]
+                        continue
+                    data = {name: value for name, value in zip(header, values) if value != ""}
+                else:
+                    data = json.loads(line)
+                yield line_no, UserImportRow.model_validate(data), None
+            except (ValueError, csv.Error) as e:
+                yield line_no, None, _describe(e)
+
+    async def _hash(self, row: UserImportRow) -> str:
+        if row.hashed_password is not None:
+            return row.hashed_password
+        async with self._hash_slots:
+            return await password_hasher.hash(row.password)
+
+    async def _write_batch(self, batch: List[Tuple[int, UserImportRow]]) -> Dict[int, dict]:
+        results: Dict[int, dict] = {}
+        unique: List[Tuple[int, UserImportRow]] = []
+        seen = set()
+        for line_no, row in batch:
+            if row.email in seen:
+                results[line_no] = {"line": line_no, "email": row.email, "status": "duplicate"}
+            else:
+                seen.add(row.email)
+                unique.append((line_no, row))
+
+        hashes = await asyncio.gather(*(self._hash(row) for _, row in unique), return_exceptions=True)
+        pending: List[Tuple[int, UserImportRow]] = []
+        values = []
+        for (line_no, row), hashed in zip(unique, hashes):
+            if isinstance(hashed, HTTPException):
+                results[line_no] = {"line": line_no, "email": row.email, "status": "error", "error": hashed.detail}
+            elif isinstance(hashed, BaseException):
+                raise hashed
+            else:
+                pending.append((line_no, row))
+                values.append({
+                    "email": row.email,
+                    "hashed_password": hashed,
+                    "provider": "email",
+                    "is_active": True,
+                    "is_verified": row.is_verified,
+                })
+
+        try:
+            created = await self.user_repo.bulk_create_users(values)
+            await self.uow.commit()
+        except SQLAlchemyError:
+            logger.exception("Bulk user import batch failed")
+            await self.uow.rollback()
+            for line_no, row in pending:
+                results[line_no] = {"line": line_no, "email": row.email, "status": "error", "error": "database error"}
+            return results
+
+        for line_no, row in pending:
+            results[line_no] = {"line": line_no, "email": row.email, "status": "created" if row.email in created else "exists"}
+        return results
+
+    async def import_users(self, lines: AsyncIterator[Optional[str]], format: str) -> AsyncIterator[dict]:
+        summary = {"created": 0, "exists": 0, "duplicate": 0, "invalid": 0, "error": 0}
+        batch: List[Tuple[int, UserImportRow]] = []
+        # Invalid rows wait for the batch they arrived in, so results stay in line order
+        invalid: Dict[int, dict] = {}
+
+        async def flush():
+            results = await self._write_batch(batch) if batch else {}
+            results.update(invalid)
+            batch.clear()
+            invalid.clear()
+            for line_no in sorted(results):
+                summary[results[line_no]["status"]] += 1
+            return [results[line_no] for line_no in sorted(results)]
+
+        async for line_no, row, error in self._parse(lines, format):
+            if row is None:
+                invalid[line_no] = {"line": line_no, "status": "invalid", "error": error}
+            else:
+                batch.append((line_no, row))
+            if len(batch) + len(invalid) >= self.batch_size:
+                for result in await flush():
+                    yield result
+        for result in await flush():
+            yield result
+        yield {"summary": summary}
@@ -1,11 +1,14 @@
 
 import secrets
 import string
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 def generate_otp(length: int = 6) -> str:
     alphabet = string.digits
     return "".join(secrets.choice(alphabet) for _ in range(length))
 
-def get_otp_expiry(minutes: int = 10) -> datetime:
-    return datetime.utcnow() + timedelta(minutes=minutes)
+OTP_EXPIRE_MINUTES = 10
+
+def get_otp_expiry(minutes: int = OTP_EXPIRE_MINUTES) -> datetime:
+    # Aware: a naive value bound to timestamptz is taken as the host's local time
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
@@ -0,0 +1,29 @@
+
+from typing import AsyncIterator, Optional
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Optional[str]]:
+    """Split a byte stream into decoded lines without buffering the whole body.
+
+    A line longer than `max_line_bytes` is skipped and yielded as None, so a
+    single bad line can't grow the buffer without bound.
+    """
+    buffer = b""
+    overflow = False
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            if overflow:
+                overflow = False
+                yield None
+            else:
+                yield buffer[start:end].rstrip(b"\r").decode("utf-8", errors="replace")
+            start = end + 1
+        buffer = buffer[start:]
+        if len(buffer) > max_line_bytes:
+            overflow = True
+            buffer = b""
+    if overflow:
+        yield None
+    elif buffer:
+        yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
@@ -0,0 +1,178 @@
+
+"""In-memory stand-ins for the repositories so benchmarks run without Postgres.
+
+Every method that would hit the database bumps `round_trips`, so request
+benchmarks can report how many DB round trips a flow would cost.
+"""
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from app.core.principal_cache import principal_cache
+from app.models.otp import OTP
+from app.models.user import User
+from app.repos.user_repo import UserRow
+from app.schemas.user import UserCreate
+
+class FakeDB:
+    def __init__(self):
+        self.users: Dict[str, User] = {}
+        self.otps: List[OTP] = []
+        self.refresh_tokens: Dict[str, SimpleNamespace] = {}
+        self.round_trips = 0
+
+    def counters(self) -> dict:
+        return {"round_trips": self.round_trips}
+
+class FakeUserRepo:
+    def __init__(self, db: FakeDB):
+        self.db = db
+
+    async def create_user(self, user: UserCreate, hashed_password: str = None, provider: str = "email", is_verified: bool = False) -> Optional[User]:
+        self.db.round_trips += 1  # INSERT ... ON CONFLICT DO NOTHING RETURNING
+        if user.email in self.db.users:
+            return None
+        db_user = User(
+            id=uuid.uuid4(),
+            email=user.email,
+            hashed_password=hashed_password,
+            provider=provider,
+            is_active=True,
+            is_verified=is_verified,
+            created_at=datetime.utcnow(),
+        )
+        self.db.users[db_user.email] = db_user
+        await principal_cache.invalidate(db_user.email)
+        return db_user
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        self.db.round_trips += 1
+        return self.db.users.get(email)
+
+    async def get_user_row(self, email: str, replica: bool = False) -> Optional[UserRow]:
+        self.db.round_trips += 1
+        user = self.db.users.get(email)
+        if user is None:
+            return None
+        return UserRow(user.id, user.email, user.hashed_password, user.provider, user.is_active, user.is_verified)
+
+    async def get_or_create_oauth_user(self, email: str, provider: str) -> User:
+        if email in self.db.users:
+            self.db.round_trips += 1
+            return self.db.users[email]
+        return await self.create_user(UserCreate(email=email, password=""), provider=provider, is_verified=True)
+
+    async def replace_password_hash(self, user_id: uuid.UUID, old_hash: str, new_hash: str) -> bool:
+        self.db.round_trips += 1
+        for user in self.db.users.values():
+            if user.id == user_id and user.hashed_password == old_hash:
+                user.hashed_password = new_hash
+                return True
+        return False
+
+    async def revoke_tokens(self, user_id: uuid.UUID) -> datetime:
+        self.db.round_trips += 1
+        return datetime.now(timezone.utc)
+
+    async def update_user(self, user: User) -> User:
+        self.db.round_trips += 1  # UPDATE, flushed by the commit
+        self.db.users[user.email] = user
+        await principal_cache.invalidate(user.email)
+        return user
+
+class FakeOTPRepo:
+    def __init__(self, db: FakeDB):
+        self.db = db
+
+    async def create_otp(self, email: str, code: str, type: str, expires_at: datetime) -> OTP:
+        self.db.round_trips += 1
+        db_otp = OTP(id=uuid.uuid4(), email=email, code=code, type=type, expires_at=expires_at, is_used=False, created_at=datetime.now(timezone.utc))
+        self.db.otps.append(db_otp)
+        return db_otp
+
+    async def get_latest_valid_otp(self, email: str, type: str) -> Optional[OTP]:
+        self.db.round_trips += 1
+        now = datetime.now(timezone.utc)
+        for otp in reversed(self.db.otps):
+            if otp.email == email and otp.type == type and not otp.is_used and otp.expires_at > now:
+                return otp
+        return None
+
+    async def get_latest_valid_code(self, email: str, type: str) -> Optional[str]:
+        otp = await self.get_latest_valid_otp(email, type)
+        return otp.code if otp is not None else None
+
+    async def get_active_code(self, email: str, type: str):
+        otp = await self.get_latest_valid_otp(email, type)
+        if otp is None:
+            return None
+        now = datetime.now(timezone.utc)
+        return otp.code, (now - otp.created_at).total_seconds(), (otp.expires_at - now).total_seconds()
+
+    async def extend_otp(self, email: str, type: str, code: str, expires_at: datetime) -> bool:
+        otp = await self.get_latest_valid_otp(email, type)
+        if otp is None or otp.code != code:
+            return False
+        otp.expires_at = expires_at
+        return True
+
+    async def consume_latest_valid_otp(self, email: str, type: str, code: str) -> bool:
+        otp = await self.get_latest_valid_otp(email, type)
+        if otp is None or otp.code != code:
+            return False
+        otp.is_used = True
+        return True
+
+    async def mark_as_used(self, otp: OTP) -> OTP:
+        self.db.round_trips += 1
+        otp.is_used = True
+        return otp
+
+class FakeRefreshTokenRepo:
+    def __init__(self, db: FakeDB):
+        self.db = db
+
+    def add(self, user_id: uuid.UUID, family_id: uuid.UUID, token_hash: str, expires_at: datetime):
+        self.db.round_trips += 1  # INSERT, flushed by the commit
+        self.db.refresh_tokens[token_hash] = SimpleNamespace(user_id=user_id, family_id=family_id, used=False)
+
+    async def use(self, token_hash: str):
+        self.db.round_trips += 1
+        token = self.db.refresh_tokens.get(token_hash)
+        if token is None or token.used:
+            return None
+        token.used = True
+        user = next(u for u in self.db.users.values() if u.id == token.user_id)
+        return SimpleNamespace(user_id=user.id, family_id=token.family_id, email=user.email, is_active=user.is_active)
+
+    async def revoke_reused_family(self, token_hash: str) -> bool:
+        self.db.round_trips += 1
+        return False
+
+    async def revoke_all(self, user_id: uuid.UUID) -> int:
+        self.db.round_trips += 1
+        revoked = [h for h, t in self.db.refresh_tokens.items() if t.user_id == user_id and not t.used]
+        for token_hash in revoked:
+            del self.db.refresh_tokens[token_hash]
+        return len(revoked)
+
+class SilentEmailService:
+    async def send_email(self, email_to: str, subject: str, content: str):
+        pass
+
+    async def send_otp_email(self, email_to: str, otp: str, type: str):
+        pass
+
+    async def queue_otp_email(self, email_to: str, otp: str, type: str):
+        pass
+
+class FakeUnitOfWork:
+    def __init__(self, db: FakeDB):
+        self.db = db
+
+    async def commit(self):
+        self.db.round_trips += 1
+
+    async def rollback(self):
+        self.db.round_trips += 1
@@ -0,0 +1,118 @@
+
+import inspect
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+BenchFn = Callable[[], Union[Any, Awaitable[Any]]]
+
+@dataclass
+class Case:
+    name: str
+    fn: BenchFn
+    iterations: int = 1000
+    warmup: int = 50
+    alloc_samples: int = 50
+    # Extra per-op counters reported alongside timings (e.g. DB round trips).
+    counters: Optional[Callable[[], Dict[str, int]]] = None
+
+@dataclass
+class Suite:
+    cases: List[Case] = field(default_factory=list)
+
+    def add(self, name: str, iterations: int = 1000, warmup: int = 50, alloc_samples: int = 50, counters=None):
+        def decorator(fn: BenchFn) -> BenchFn:
+            self.cases.append(Case(name, fn, iterations, warmup, alloc_samples, counters))
+            return fn
+        return decorator
+
+async def _call(fn: BenchFn):
+    result = fn()
+    if inspect.isawaitable(result):
+        await result
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_case(case: Case, scale: float = 1.0) -> dict:
+    iterations = max(1, int(case.iterations * scale))
+    for _ in range(case.warmup):
+        await _call(case.fn)
+
+    before = case.counters() if case.counters else {}
+    timings = []
+    total_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        await _call(case.fn)
+        timings.append(time.perf_counter_ns() - start)
+    total = time.perf_counter() - total_start
+    after = case.counters() if case.counters else {}
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(1, min(case.alloc_samples, iterations))):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await _call(case.fn)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    result = {
+        "iterations": iterations,
+        "ops_per_sec": iterations / total if total else 0.0,
+        "mean_us": statistics.fmean(timings) / 1000,
+        "p50_us": _percentile(timings, 50) / 1000,
+        "p95_us": _percentile(timings, 95) / 1000,
+        "p99_us": _percentile(timings, 99) / 1000,
+        "alloc_peak_bytes": int(statistics.fmean(peaks)),
+    }
+    for key, value in after.items():
+        result[f"{key}_per_op"] = (value - before.get(key, 0)) / iterations
+    return result
+
+async def run_suite(suite: Suite, pattern: Optional[str] = None, scale: float = 1.0, log=print) -> dict:
+    results = {}
+    for case in suite.cases:
+        if pattern and pattern not in case.name:
+            continue
+        results[case.name] = await run_case(case, scale)
+        r = results[case.name]
+        log(f"{case.name:<40} {r['ops_per_sec']:>12.1f} ops/s  p50 {r['p50_us']:>10.1f}us  p99 {r['p99_us']:>10.1f}us")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> List[dict]:
+    """Return one entry per case present in both runs; `regression` is set when
+    throughput dropped or p95 latency grew by more than `threshold`."""
+    report = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        throughput_change = (cur["ops_per_sec"] - base["ops_per_sec"]) / base["ops_per_sec"] if base["ops_per_sec"] else 0.0
+        p95_change = (cur["p95_us"] - base["p95_us"]) / base["p95_us"] if base["p95_us"] else 0.0
+        report.append({
+            "name": name,
+            "ops_per_sec_change": throughput_change,
+            "p95_change": p95_change,
+            "regression": throughput_change < -threshold or p95_change > threshold,
+        })
+    return report
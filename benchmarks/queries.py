@@ -0,0 +1,120 @@
+"""Per-query benchmarks for the hot repository lookups, against a real database.
+
+    python -m benchmarks.queries --output queries.json
+    python -m benchmarks.queries --compare queries.json --threshold 0.15
+
+Needs the usual POSTGRES_* settings and a migrated database. Each lookup runs
+three ways: the plain ORM select built per call, the cached lambda statement
+(`get_user_by_email` / `get_latest_valid_otp`) and the prepared row path
+(`get_user_row` / `get_latest_valid_code`).
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+
+from app.db.session import AsyncSessionLocal, engine
+from app.db.unit_of_work import UnitOfWork
+from app.models.otp import OTP
+from app.models.user import User
+from app.repos.otp_repo import OTPRepo
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+from app.utils.otp import get_otp_expiry
+from benchmarks.harness import Suite, compare, run_suite
+
+def build_suite(session, email: str) -> Suite:
+    suite = Suite()
+    user_repo = UserRepo(session)
+    otp_repo = OTPRepo(session)
+
+    # Every case starts from an empty identity map, like a fresh request would
+    @suite.add("query user by email[orm]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        result = await session.execute(select(User).where(User.email == email))
+        assert result.scalars().first() is not None
+
+    @suite.add("query user by email[lambda]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        assert await user_repo.get_user_by_email(email) is not None
+
+    @suite.add("query user by email[row]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        assert await user_repo.get_user_row(email) is not None
+
+    @suite.add("query latest otp[orm]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        result = await session.execute(
+            select(OTP)
+            .where(OTP.email == email, OTP.type == "register", OTP.is_used == False, OTP.expires_at > func.now())
+            .order_by(OTP.created_at.desc())
+        )
+        assert result.scalars().first() is not None
+
+    @suite.add("query latest otp[lambda]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        assert await otp_repo.get_latest_valid_otp(email, "register") is not None
+
+    @suite.add("query latest otp[code]", iterations=2000)
+    async def _():
+        session.expunge_all()
+        assert await otp_repo.get_latest_valid_code(email, "register") is not None
+
+    return suite
+
+async def main_async(args) -> dict:
+    email = f"bench_query_{uuid.uuid4()}@example.com"
+    try:
+        async with AsyncSessionLocal() as session:
+            await UserRepo(session).create_user(UserCreate(email=email, password="x"), "hash")
+            await OTPRepo(session).create_otp(email, "123456", "register", get_otp_expiry())
+            await UnitOfWork(session).commit()
+        async with AsyncSessionLocal() as session:
+            suite = build_suite(session, email)
+            return await run_suite(suite, args.filter, args.scale, log=lambda line: print(line, file=sys.stderr))
+    finally:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(OTP).where(OTP.email == email))
+            await session.execute(delete(User).where(User.email == email))
+            await session.commit()
+        await engine.dispose()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change treated as a regression")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    elif not args.compare:
+        json.dump(results, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report = compare(results, baseline, args.threshold)
+        for row in report:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['name']:<40} ops/s {row['ops_per_sec_change']:+7.1%}  p95 {row['p95_change']:+7.1%}  {flag}")
+        if any(row["regression"] for row in report):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+
+"""Micro-benchmarks for the auth hot paths.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.15
+
+Runs entirely in-process against in-memory repositories; no database needed.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+
+# Settings are required at import time; benchmarks don't need real values.
+for _key, _value in {
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "bench",
+    "POSTGRES_PASSWORD": "bench",
+    "POSTGRES_DB": "bench",
+    "SECRET_KEY": "benchmark-secret",
+    # Every request comes from one client; throttling would cut the runs short
+    "RATE_LIMIT_ENABLED": "false",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from httpx import ASGITransport, AsyncClient
+
+from app.api import deps
+from app.api.v1.routers import auth as auth_routes
+from app.core import security
+from app.core.hashing import password_hasher
+from app.core.principal_cache import principal_cache
+from app.main import app
+from app.schemas.token import Token
+from app.schemas.user import UserCreate, UserResponse
+from app.utils.otp import generate_otp, get_otp_expiry
+from benchmarks.fakes import FakeDB, FakeOTPRepo, FakeRefreshTokenRepo, FakeUnitOfWork, FakeUserRepo, SilentEmailService
+from benchmarks.harness import Suite, compare, run_suite
+
+PASSWORD = "password123"
+
+async def build_suite(client: AsyncClient, db: FakeDB) -> Suite:
+    suite = Suite()
+    user_repo = FakeUserRepo(db)
+    otp_repo = FakeOTPRepo(db)
+
+    # Seed a verified user for login/token benchmarks.
+    hashed = security.get_password_hash(PASSWORD)
+    login_user = await user_repo.create_user(UserCreate(email="bench@example.com", password=PASSWORD), hashed, is_verified=True)
+    token = security.create_access_token(login_user.email)
+    user_payload = {"email": "bench@example.com", "password": PASSWORD}
+    response_data = {"id": str(login_user.id), "email": login_user.email, "is_active": True, "is_verified": True}
+
+    @suite.add("security.create_access_token", iterations=5000)
+    def _():
+        security.create_access_token(login_user.email)
+
+    @suite.add("security.decode_access_token[cold]", iterations=5000)
+    def _():
+        security.token_cache.clear()
+        security.decode_access_token(token)
+
+    @suite.add("security.decode_access_token[cached]", iterations=20000)
+    def _():
+        security.decode_access_token(token)
+
+    @suite.add("deps.get_current_user[cold]", iterations=5000, counters=db.counters)
+    async def _():
+        security.token_cache.clear()
+        principal_cache.clear()
+        await deps.get_current_user(token=token, user_repo=user_repo)
+
+    @suite.add("deps.get_current_user[cached]", iterations=20000, counters=db.counters)
+    async def _():
+        await deps.get_current_user(token=token, user_repo=user_repo)
+
+    @suite.add("security.get_password_hash", iterations=10, warmup=1, alloc_samples=2)
+    def _():
+        security.get_password_hash(PASSWORD)
+
+    @suite.add("security.verify_password", iterations=10, warmup=1, alloc_samples=2)
+    def _():
+        security.verify_password(PASSWORD, hashed)
+
+    @suite.add("utils.generate_otp", iterations=20000)
+    def _():
+        generate_otp()
+
+    @suite.add("schemas.UserCreate.validate", iterations=20000)
+    def _():
+        UserCreate.model_validate(user_payload)
+
+    @suite.add("schemas.UserResponse.validate", iterations=20000)
+    def _():
+        UserResponse.model_validate(login_user)
+
+    @suite.add("schemas.UserResponse.dump_json", iterations=20000)
+    def _():
+        UserResponse.model_validate(response_data).model_dump_json()
+
+    # Response serialization: FastAPI's response_model path (validate, dump to
+    # Python, jsonable/json.dumps) against the prebuilt serializers the routes use.
+    user_field = create_model_field("Response_register", UserResponse, mode="serialization")
+    token_field = create_model_field("Response_login", Token, mode="serialization")
+    token_model = Token(access_token=token, refresh_token="r" * 43, token_type="bearer")
+
+    @suite.add("serialize register[fastapi]", iterations=20000)
+    async def _():
+        JSONResponse(await serialize_response(field=user_field, response_content=login_user))
+
+    @suite.add("serialize register[prebuilt]", iterations=20000)
+    def _():
+        auth_routes.user_response.response(login_user)
+
+    @suite.add("serialize login[fastapi]", iterations=20000)
+    async def _():
+        JSONResponse(await serialize_response(field=token_field, response_content=token_model))
+
+    @suite.add("serialize login[prebuilt]", iterations=20000)
+    def _():
+        auth_routes.token_response.response(token_model)
+
+    @suite.add("serialize message[fastapi]", iterations=20000)
+    async def _():
+        JSONResponse(await serialize_response(response_content={"message": "OTP is valid"}))
+
+    @suite.add("serialize message[constant]", iterations=20000)
+    def _():
+        auth_routes.otp_valid()
+
+    emails = (f"bench_{i}@example.com" for i in itertools.count())
+
+    @suite.add("http POST /auth/register", iterations=20, warmup=2, alloc_samples=2, counters=db.counters)
+    async def _():
+        response = await client.post("/api/v1/auth/register", json={"email": next(emails), "password": PASSWORD})
+        assert response.status_code == 200, response.text
+
+    replay_body = {"email": "bench_replay@example.com", "password": PASSWORD}
+    replay_headers = {"Idempotency-Key": "bench-replay"}
+
+    # A client retry: served from the idempotency store, no hashing or email
+    @suite.add("http POST /auth/register[replay]", iterations=500, counters=db.counters)
+    async def _():
+        response = await client.post("/api/v1/auth/register", json=replay_body, headers=replay_headers)
+        assert response.status_code == 200, response.text
+
+    @suite.add("http POST /auth/login", iterations=20, warmup=2, alloc_samples=2, counters=db.counters)
+    async def _():
+        response = await client.post("/api/v1/auth/login", data={"username": login_user.email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+
+    refresh_token = None
+
+    @suite.add("http POST /auth/refresh", iterations=500, counters=db.counters)
+    async def _():
+        # Each refresh rotates the token, so keep the newest one for the next call
+        nonlocal refresh_token
+        if refresh_token is None:
+            before = db.round_trips
+            response = await client.post("/api/v1/auth/login", data={"username": login_user.email, "password": PASSWORD})
+            refresh_token = response.json()["refresh_token"]
+            db.round_trips = before
+        response = await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200, response.text
+        refresh_token = response.json()["refresh_token"]
+
+    pending = (f"pending_{i}@example.com" for i in itertools.count())
+
+    async def seed_unverified() -> tuple[str, str]:
+        email = next(pending)
+        await user_repo.create_user(UserCreate(email=email, password=PASSWORD), hashed)
+        code = generate_otp()
+        await otp_repo.create_otp(email, code, "register", get_otp_expiry())
+        return email, code
+
+    @suite.add("http POST /auth/verify-registration", iterations=500, counters=db.counters)
+    async def _():
+        # Seeding is not part of the measured request, so take it off the counters.
+        before = db.round_trips
+        email, code = await seed_unverified()
+        db.round_trips = before
+        response = await client.post("/api/v1/auth/verify-registration", json={"email": email, "otp": code})
+        assert response.status_code == 200, response.text
+
+    return suite
+
+async def main_async(args) -> dict:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = FakeDB()
+    app.dependency_overrides[deps.get_user_repo] = lambda: FakeUserRepo(db)
+    app.dependency_overrides[deps.get_otp_repo] = lambda: FakeOTPRepo(db)
+    app.dependency_overrides[deps.get_email_service] = lambda: SilentEmailService()
+    app.dependency_overrides[deps.get_uow] = lambda: FakeUnitOfWork(db)
+    app.dependency_overrides[deps.get_refresh_token_repo] = lambda: FakeRefreshTokenRepo(db)
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            suite = await build_suite(client, db)
+            return await run_suite(suite, args.filter, args.scale, log=lambda line: print(line, file=sys.stderr))
+    finally:
+        app.dependency_overrides.clear()
+        password_hasher.shutdown()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change treated as a regression")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(main_async(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    elif not args.compare:
+        json.dump(results, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report = compare(results, baseline, args.threshold)
+        for row in report:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['name']:<40} ops/s {row['ops_per_sec_change']:+7.1%}  p95 {row['p95_change']:+7.1%}  {flag}")
+        if any(row["regression"] for row in report):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
-def main():
-    print("Hello from v1!")
+import sys
 
+from app.serve import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Pick the password hash cost for this host from a latency budget.
+
+    python scripts/calibrate_password_hash.py --target-ms 250
+    python scripts/calibrate_password_hash.py --scheme argon2 --target-ms 250 --memory-kib 65536
+
+Times single hashes at increasing cost and prints the settings for the highest
+cost that stays within the target. Run it on the production instance type:
+one hash occupies one hashing worker, so login throughput is roughly
+PASSWORD_HASH_WORKERS / (target seconds).
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from passlib.hash import argon2, bcrypt
+
+PASSWORD = "calibration-password"
+
+def time_hash(handler, samples: int) -> float:
+    handler.hash(PASSWORD)  # load the backend outside the timing
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash(PASSWORD)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> dict:
+    chosen = 4
+    for rounds in range(4, 32):
+        ms = time_hash(bcrypt.using(rounds=rounds), samples)
+        print(f"bcrypt rounds={rounds:<2} {ms:9.1f} ms")
+        if ms > target_ms:
+            break
+        chosen = rounds
+    return {"PASSWORD_HASH_SCHEME": "bcrypt", "PASSWORD_BCRYPT_ROUNDS": chosen}
+
+def calibrate_argon2(target_ms: float, samples: int, memory_kib: int, parallelism: int) -> dict:
+    if not argon2.has_backend():
+        sys.exit("argon2 needs the argon2-cffi package")
+    chosen = 1
+    for time_cost in range(1, 64):
+        handler = argon2.using(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+        ms = time_hash(handler, samples)
+        print(f"argon2 time_cost={time_cost:<2} memory={memory_kib} KiB {ms:9.1f} ms")
+        if ms > target_ms:
+            break
+        chosen = time_cost
+    return {
+        "PASSWORD_HASH_SCHEME": "argon2",
+        "PASSWORD_ARGON2_TIME_COST": chosen,
+        "PASSWORD_ARGON2_MEMORY_KIB": memory_kib,
+        "PASSWORD_ARGON2_PARALLELISM": parallelism,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="latency budget for one hash")
+    parser.add_argument("--samples", type=int, default=3, help="hashes timed per cost (median is used)")
+    parser.add_argument("--memory-kib", type=int, default=65536, help="argon2 memory cost")
+    parser.add_argument("--parallelism", type=int, default=1, help="argon2 threads per hash")
+    args = parser.parse_args()
+
+    if args.scheme == "bcrypt":
+        result = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        result = calibrate_argon2(args.target_ms, args.samples, args.memory_kib, args.parallelism)
+    print("\nSettings for a hash within %.0f ms:" % args.target_ms)
+    for name, value in result.items():
+        print(f"{name}={value}")
+    print("\nExisting hashes are upgraded (or downgraded) as their users log in.")
+
+if __name__ == "__main__":
+    main()
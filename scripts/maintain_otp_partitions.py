@@ -0,0 +1,13 @@
+import asyncio
+from app.db.maintenance import run_maintenance
+from app.db.session import AsyncSessionLocal, engine
+
+async def main():
+    result = await run_maintenance(engine, AsyncSessionLocal)
+    print(f"Created partitions: {result['created'] or 'none'}")
+    print(f"Dropped partitions: {result['dropped'] or 'none'}")
+    print(f"Purged refresh tokens: {result['refresh_tokens_purged']}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+
+def profile_imports(module: str, top: int):
+    # -X importtime writes "import time: self [us] | cumulative | imported package" to stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    if not rows:
+        print(result.stderr)
+        sys.exit(f"Importing {module} failed")
+    total = max(cumulative for _, cumulative, _ in rows)
+    print(f"import {module}: {total / 1000:.1f} ms, {len(rows)} modules")
+    print(f"\nTop {top} by cumulative time:")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print(f"\nTop {top} by self time:")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: -r[0])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name.strip()}")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def profile_cold_start(path: str, timeout: float):
+    # Time from spawning the server to its first 200; uvicorn only accepts
+    # connections after the lifespan startup (warmup included) has finished.
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "app.main:create_app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=url) as client:
+            while True:
+                if server.poll() is not None:
+                    sys.exit(f"Server exited with code {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    sys.exit(f"No 200 from {path} within {timeout}s")
+                try:
+                    response = client.get(path)
+                    if response.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+            print(f"\nCold start to first 200 on {path}: {ready * 1000:.0f} ms")
+            try:
+                metrics = client.get("/metrics").text
+            except httpx.HTTPError:
+                metrics = ""
+            for line in metrics.splitlines():
+                if line.startswith("startup_warmup_"):
+                    print(f"  {line}")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and cold start to first 200")
+    parser.add_argument("--module", default="app.main", help="module to profile imports of")
+    parser.add_argument("--top", type=int, default=20, help="modules listed per table")
+    parser.add_argument("--path", default="/health", help="path polled for the first 200")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--skip-server", action="store_true", help="only profile imports")
+    args = parser.parse_args()
+
+    profile_imports(args.module, args.top)
+    if not args.skip_server:
+        profile_cold_start(args.path, args.timeout)
+
+if __name__ == "__main__":
+    main()
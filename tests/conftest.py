@@ -1,9 +1,34 @@
 
+import time
 import pytest
 from typing import AsyncGenerator
 from httpx import AsyncClient
 from app.main import app
-from app.db.session import AsyncSessionLocal
+from app.core.rate_limit import rate_limiter
+from app.db.session import AsyncSessionLocal, engine, replicas
+
+@pytest.fixture(autouse=True)
+async def dispose_engine() -> AsyncGenerator:
+    # Each test runs on its own event loop; pooled asyncpg connections are bound
+    # to the loop that opened them, so drop them between tests.
+    yield
+    await engine.dispose()
+    await replicas.dispose()
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # All test requests share one client IP
+    rate_limiter.backend.clear()
+
+@pytest.fixture
+def non_utc_timezone(monkeypatch):
+    # Naive datetimes bound to timestamptz are read as local time, so code that
+    # only works in UTC fails here
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
 
 @pytest.fixture
 async def db() -> AsyncGenerator:
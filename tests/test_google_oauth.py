@@ -0,0 +1,120 @@
+import json
+import time
+import uuid
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+from httpx import AsyncClient
+from app.api import deps
+from app.main import app
+from app.services.google_oauth import GoogleOAuthClient, JWKSCache
+
+CLIENT_ID = "test-client"
+ISSUER = "https://accounts.google.com"
+
+def make_key(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    return pem, {**public, "kid": kid, "use": "sig"}
+
+class StandInGoogle:
+    """Local stand-in for the token and JWKS endpoints."""
+
+    def __init__(self, max_age: int = 3600):
+        self.max_age = max_age
+        self.keys = {}
+        self.signing_kid = None
+        self.requests = []
+        self.email = "google_user@example.com"
+        self.audience = CLIENT_ID
+        self.rotate()
+
+    def rotate(self):
+        kid = f"kid-{len(self.keys)}"
+        self.keys[kid] = make_key(kid)
+        self.signing_kid = kid
+
+    def id_token(self) -> str:
+        pem, _ = self.keys[self.signing_kid]
+        now = int(time.time())
+        claims = {
+            "iss": ISSUER,
+            "aud": self.audience,
+            "sub": "1234",
+            "email": self.email,
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 300,
+        }
+        return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": self.signing_kid})
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        if request.url.path == "/token":
+            return httpx.Response(200, json={"access_token": "at", "id_token": self.id_token()})
+        if request.url.path == "/certs":
+            body = {"keys": [public for _, public in self.keys.values()]}
+            return httpx.Response(200, content=json.dumps(body), headers={"Cache-Control": f"public, max-age={self.max_age}"})
+        return httpx.Response(404)
+
+def make_client(server: StandInGoogle, clock=time.time) -> GoogleOAuthClient:
+    http = httpx.AsyncClient(transport=httpx.MockTransport(server.handler), base_url="https://google.test")
+    return GoogleOAuthClient(
+        client_id=CLIENT_ID,
+        client_secret="secret",
+        redirect_uri="http://test/callback",
+        token_uri="https://google.test/token",
+        issuers=[ISSUER],
+        jwks=JWKSCache("https://google.test/certs", http_client=lambda: http, clock=clock, min_refresh_interval=0),
+        http_client=lambda: http,
+    )
+
+@pytest.mark.asyncio
+async def test_keys_are_cached_until_max_age():
+    now = [1000.0]
+    server = StandInGoogle(max_age=60)
+    google = make_client(server, clock=lambda: now[0])
+    assert (await google.authenticate("code"))["email"] == server.email
+    await google.authenticate("code")
+    assert server.requests.count("/certs") == 1
+    assert "/oauth2/v2/userinfo" not in server.requests
+    now[0] += 61
+    await google.authenticate("code")
+    assert server.requests.count("/certs") == 2
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refreshes_keys():
+    server = StandInGoogle()
+    google = make_client(server)
+    await google.authenticate("code")
+    server.rotate()
+    assert (await google.authenticate("code"))["email"] == server.email
+    assert server.requests.count("/certs") == 2
+
+@pytest.mark.asyncio
+async def test_wrong_audience_is_rejected():
+    server = StandInGoogle()
+    server.audience = "someone-else"
+    with pytest.raises(HTTPException) as exc:
+        await make_client(server).authenticate("code")
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_google_callback_logs_in(client: AsyncClient):
+    server = StandInGoogle()
+    server.email = f"google_{uuid.uuid4()}@example.com"
+    app.dependency_overrides[deps.get_google_oauth] = lambda: make_client(server)
+    try:
+        response = await client.get("/api/v1/auth/google/callback", params={"code": "code"})
+    finally:
+        app.dependency_overrides.pop(deps.get_google_oauth)
+    assert response.status_code == 200, response.text
+    assert response.json()["token_type"] == "bearer"
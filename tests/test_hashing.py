@@ -0,0 +1,27 @@
+
+import pytest
+from fastapi import HTTPException
+from app.core.hashing import PasswordHasher
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_on_pool():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    try:
+        hashed = await hasher.hash("password123")
+        assert await hasher.verify("password123", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["pending"] == 0
+        assert stats["queue_wait_seconds"]["count"] == 3
+    finally:
+        hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_saturated_pool_returns_503():
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    hasher.pending = hasher.capacity
+    with pytest.raises(HTTPException) as exc_info:
+        await hasher.hash("password123")
+    assert exc_info.value.status_code == 503
+    assert hasher.stats()["rejected"] == 1
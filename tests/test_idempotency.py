@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func
+from sqlalchemy.future import select
+from starlette.responses import Response
+from app.core.idempotency import IdempotencyBackend, IdempotencyStore, KeyValueIdempotencyBackend, MemoryIdempotencyBackend
+from app.db.session import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+
+def make_store(backend=None) -> IdempotencyStore:
+    return IdempotencyStore(backend or MemoryIdempotencyBackend(maxsize=100), ttl=60, lock_ttl=1, poll_interval=0.01)
+
+def test_backend_without_storage_fails_on_creation():
+    class ClaimOnlyBackend(IdempotencyBackend):
+        async def claim(self, key, ttl):
+            return True
+
+    with pytest.raises(TypeError):
+        ClaimOnlyBackend()
+
+class SlowCall:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self) -> Response:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return Response(b'{"n": %d}' % self.calls, media_type="application/json")
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_first():
+    store, call = make_store(), SlowCall()
+    responses = await asyncio.gather(*(store.run("register", "key-1", b"{}", call) for _ in range(5)))
+    assert call.calls == 1
+    assert {r.body for r in responses} == {b'{"n": 1}'}
+    assert store.waited == 4
+    # Later retries replay the stored response
+    replay = await store.run("register", "key-1", b"{}", call)
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert call.calls == 1
+
+@pytest.mark.asyncio
+async def test_errors_are_not_stored():
+    store = make_store()
+
+    async def fail() -> Response:
+        raise HTTPException(status_code=400, detail="nope")
+
+    with pytest.raises(HTTPException):
+        await store.run("register", "key-1", b"{}", fail)
+    call = SlowCall()
+    await store.run("register", "key-1", b"{}", call)
+    assert call.calls == 1
+
+@pytest.mark.asyncio
+async def test_key_reused_with_another_payload_is_rejected():
+    store = make_store()
+    await store.run("register", "key-1", b'{"email": "a"}', SlowCall())
+    with pytest.raises(HTTPException) as exc:
+        await store.run("register", "key-1", b'{"email": "b"}', SlowCall())
+    assert exc.value.status_code == 422
+    # Keys are scoped per route
+    await store.run("forgot-password", "key-1", b'{"email": "b"}', SlowCall())
+
+class FakeKeyValueClient:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+@pytest.mark.asyncio
+async def test_shared_backend_coordinates_workers():
+    client, call = FakeKeyValueClient(), SlowCall()
+    workers = [make_store(KeyValueIdempotencyBackend(client)) for _ in range(2)]
+    first, second = await asyncio.gather(
+        workers[0].run("register", "key-1", b"{}", call),
+        workers[1].run("register", "key-1", b"{}", call),
+    )
+    assert call.calls == 1
+    assert first.body == second.body
+
+@pytest.mark.asyncio
+async def test_retried_register_sends_one_email(client: AsyncClient):
+    email = f"idem_{uuid.uuid4()}@example.com"
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    body = {"email": email, "password": "password123"}
+    first = await client.post("/api/v1/auth/register", json=body, headers=headers)
+    retry = await client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    async with AsyncSessionLocal() as session:
+        emails = await session.scalar(select(func.count()).select_from(EmailOutbox).where(EmailOutbox.email_to == email))
+    assert emails == 1
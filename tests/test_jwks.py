@@ -0,0 +1,68 @@
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from httpx import ASGITransport, AsyncClient
+from jose import JWTError, jwt
+from app import main
+from app.core import security
+from app.core.keys import load_key_ring
+
+def write_key(directory, kid: str, public_only: bool = False):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if public_only:
+        pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    else:
+        pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+@pytest.fixture
+def key_dir(tmp_path):
+    write_key(tmp_path, "2026-01")
+    write_key(tmp_path, "2026-02")
+    write_key(tmp_path, "2025-12", public_only=True)
+    return tmp_path
+
+def test_rotation_keeps_old_tokens_valid(monkeypatch, key_dir):
+    security.token_cache.clear()
+    monkeypatch.setattr(security, "key_ring", load_key_ring(str(key_dir), "RS256", "2026-01"))
+    old_token = security.create_access_token("rotate@example.com")
+    assert jwt.get_unverified_header(old_token)["kid"] == "2026-01"
+
+    ring = load_key_ring(str(key_dir), "RS256")
+    assert ring.signing_kid == "2026-02"
+    monkeypatch.setattr(security, "key_ring", ring)
+    new_token = security.create_access_token("rotate@example.com")
+    assert jwt.get_unverified_header(new_token)["kid"] == "2026-02"
+    assert security.decode_access_token(old_token).sub == "rotate@example.com"
+    assert security.decode_access_token(new_token).sub == "rotate@example.com"
+
+def test_unknown_kid_and_hs256_tokens_are_rejected(monkeypatch, key_dir):
+    security.token_cache.clear()
+    hs_token = security.create_access_token("hs@example.com")
+    monkeypatch.setattr(security, "key_ring", load_key_ring(str(key_dir), "RS256"))
+    with pytest.raises(JWTError):
+        security.decode_access_token(hs_token)
+    forged = jwt.encode({"sub": "x"}, "secret", algorithm="HS256", headers={"kid": "2026-02"})
+    with pytest.raises(JWTError):
+        security.decode_access_token(forged)
+
+@pytest.mark.asyncio
+async def test_jwks_lets_other_services_verify(monkeypatch, key_dir):
+    ring = load_key_ring(str(key_dir), "RS256")
+    monkeypatch.setattr(security, "key_ring", ring)
+    monkeypatch.setattr(main, "key_ring", ring)
+    token = security.create_access_token("jwks@example.com")
+
+    async with AsyncClient(transport=ASGITransport(app=main.create_app()), base_url="http://test") as client:
+        response = await client.get("/.well-known/jwks.json")
+        assert response.status_code == 200
+        assert "max-age=" in response.headers["cache-control"]
+        jwks = response.json()
+        assert [k["kid"] for k in jwks["keys"]] == ["2025-12", "2026-01", "2026-02"]
+        assert all("d" not in k for k in jwks["keys"])
+
+        cached = await client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+
+    # What a downstream service does with the published set, no shared secret
+    assert jwt.decode(token, jwks, algorithms=["RS256"])["sub"] == "jwks@example.com"
@@ -0,0 +1,32 @@
+
+import pytest
+from httpx import AsyncClient
+from app.core.metrics import Registry
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_records_routes(client: AsyncClient):
+    response = await client.get("/health")
+    assert response.status_code == 200
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in body
+    assert "password_hash_pending" in body
+    assert "db_pool_checked_out" in body
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels("/a").inc()
+    requests.labels("/a").inc()
+    latency.labels().observe(0.5)
+
+    text = registry.render()
+    assert 'requests_total{route="/a"} 2.0' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
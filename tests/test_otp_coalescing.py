@@ -0,0 +1,72 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.models.email_outbox import EmailOutbox
+from app.models.otp import OTP
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+from app.services.auth_service import otp_issues
+
+async def create_user() -> str:
+    email = f"resend_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(
+            UserCreate(email=email, password="password123"), get_password_hash("password123"), is_verified=True
+        )
+        await UnitOfWork(session).commit()
+    return email
+
+async def sent(email: str):
+    async with AsyncSessionLocal() as session:
+        codes = (await session.scalars(select(OTP.code).where(OTP.email == email).order_by(OTP.created_at))).all()
+        emails = await session.scalar(select(func.count()).select_from(EmailOutbox).where(EmailOutbox.email_to == email))
+    return list(codes), emails
+
+async def forgot(client: AsyncClient, email: str):
+    response = await client.post("/api/v1/auth/forgot-password", json={"email": email})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_resend_within_debounce_is_suppressed(client: AsyncClient):
+    email = await create_user()
+    suppressed = otp_issues.labels("suppressed").value
+    await forgot(client, email)
+    await forgot(client, email)
+    codes, emails = await sent(email)
+    assert len(codes) == 1 and emails == 1
+    assert otp_issues.labels("suppressed").value == suppressed + 1
+
+@pytest.mark.asyncio
+async def test_resend_reuses_active_code(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "OTP_EMAIL_DEBOUNCE_SECONDS", 0)
+    email = await create_user()
+    await forgot(client, email)
+    await forgot(client, email)
+    codes, emails = await sent(email)
+    assert len(codes) == 1 and emails == 2
+
+    # Past the resend window a fresh code replaces it
+    monkeypatch.setattr(settings, "OTP_RESEND_WINDOW_SECONDS", 0)
+    await forgot(client, email)
+    codes, emails = await sent(email)
+    assert len(codes) == 2 and emails == 3
+
+@pytest.mark.asyncio
+async def test_coalescing_outside_utc(client: AsyncClient, monkeypatch, non_utc_timezone):
+    # Window and debounce decisions use ages computed from the stored expiry
+    email = await create_user()
+    await forgot(client, email)
+    await forgot(client, email)
+    codes, emails = await sent(email)
+    assert len(codes) == 1 and emails == 1
+
+    monkeypatch.setattr(settings, "OTP_EMAIL_DEBOUNCE_SECONDS", 0)
+    await forgot(client, email)
+    codes, emails = await sent(email)
+    assert len(codes) == 1 and emails == 2
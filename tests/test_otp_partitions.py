@@ -0,0 +1,45 @@
+
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.db.otp_partitions import maintain_otp_partitions, partition_day, partition_name, partitions_to_drop
+from app.db.session import engine
+
+def test_partition_name_round_trip():
+    assert partition_name(date(2026, 3, 7)) == "otps_p20260307"
+    assert partition_day("otps_p20260307") == date(2026, 3, 7)
+    assert partition_day("otps_default") is None
+
+def test_partitions_to_drop_respects_retention():
+    names = ["otps_default", "otps_p20260301", "otps_p20260305", "otps_p20260306", "otps_p20260310"]
+    assert partitions_to_drop(names, today=date(2026, 3, 8), retention_days=2) == [
+        "otps_p20260301",
+        "otps_p20260305",
+    ]
+
+@pytest.mark.asyncio
+async def test_rows_in_default_partition_move_to_new_partition():
+    today = datetime.now(timezone.utc).date()
+    ahead = today + timedelta(days=20)
+    stale = today - timedelta(days=30)
+    email = f"partition_{uuid.uuid4()}@example.com"
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {partition_name(ahead)}"))
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(stale)} PARTITION OF otps "
+            f"FOR VALUES FROM ('{stale} 00:00:00+00') TO ('{stale + timedelta(days=1)} 00:00:00+00')"
+        ))
+        await conn.execute(
+            text("INSERT INTO otps (id, email, code, type, expires_at, created_at) VALUES (:id, :email, '1', 'register', :at, :at)"),
+            {"id": uuid.uuid4(), "email": email, "at": datetime.combine(ahead, time(12), timezone.utc)},
+        )
+
+    result = await maintain_otp_partitions(engine, days_ahead=20, retention_days=2)
+    assert partition_name(ahead) in result["created"]
+    assert partition_name(stale) in result["dropped"]
+    async with engine.begin() as conn:
+        where = {"email": email}
+        home = await conn.scalar(text("SELECT tableoid::regclass::text FROM otps WHERE email = :email"), where)
+        assert home == partition_name(ahead)
+        await conn.execute(text("DELETE FROM otps WHERE email = :email"), where)
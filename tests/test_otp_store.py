@@ -0,0 +1,117 @@
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.repos.otp_store import KeyValueOTPStore, MemoryOTPStore, OTPStore, TimerWheel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeKeyValueClient:
+    """Local stand-in for redis.asyncio.Redis (GET/SET PX/DEL only)."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        entry = self.data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return entry[0].encode()
+
+    async def set(self, key, value, px):
+        self.data[key] = (value, time.monotonic() + px / 1000)
+        return True
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if await self.get(key) is not None:
+                del self.data[key]
+                removed += 1
+        return removed
+
+def expiry(minutes: float = 10) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+
+@pytest.fixture(params=["memory", "key_value"])
+def store(request):
+    if request.param == "memory":
+        return MemoryOTPStore()
+    return KeyValueOTPStore(FakeKeyValueClient())
+
+@pytest.mark.asyncio
+async def test_verify_does_not_consume(store):
+    await store.issue("a@example.com", "register", "123456", expiry())
+    assert await store.verify("a@example.com", "register", "123456")
+    assert await store.verify("a@example.com", "register", "123456")
+    assert not await store.verify("a@example.com", "register", "000000")
+    assert not await store.verify("a@example.com", "reset_password", "123456")
+
+@pytest.mark.asyncio
+async def test_consume_only_once(store):
+    await store.issue("b@example.com", "register", "123456", expiry())
+    assert await store.consume("b@example.com", "register", "123456")
+    assert not await store.consume("b@example.com", "register", "123456")
+    assert not await store.verify("b@example.com", "register", "123456")
+
+@pytest.mark.asyncio
+async def test_reissue_invalidates_previous_code(store):
+    await store.issue("c@example.com", "register", "111111", expiry())
+    await store.issue("c@example.com", "register", "222222", expiry())
+    assert not await store.consume("c@example.com", "register", "111111")
+    assert await store.consume("c@example.com", "register", "222222")
+
+@pytest.mark.asyncio
+async def test_extend_keeps_code_and_issue_time(store):
+    assert await store.active("f@example.com", "register") is None
+    await store.issue("f@example.com", "register", "123456", expiry(minutes=1))
+    active = await store.active("f@example.com", "register")
+    assert active.code == "123456" and active.age < 5 and 50 < active.remaining <= 60
+
+    await store.extend("f@example.com", "register", "123456", expiry(minutes=10))
+    extended = await store.active("f@example.com", "register")
+    assert extended.code == "123456" and extended.age < 5 and extended.remaining > 590
+    assert await store.consume("f@example.com", "register", "123456")
+    assert await store.active("f@example.com", "register") is None
+
+@pytest.mark.asyncio
+async def test_memory_store_expires_entries_on_wheel():
+    clock = FakeClock()
+    store = MemoryOTPStore(clock=clock)
+    await store.issue("d@example.com", "register", "123456", expiry(minutes=1))
+    await store.issue("e@example.com", "register", "654321", expiry(minutes=60))
+    assert len(store) == 2
+
+    clock.now += 61
+    assert not await store.verify("d@example.com", "register", "123456")
+    assert len(store) == 1
+
+    # Beyond one wheel revolution: the entry is rescheduled, not dropped early
+    clock.now += 1100
+    assert await store.verify("e@example.com", "register", "654321")
+    clock.now += 3600
+    assert not await store.verify("e@example.com", "register", "654321")
+    assert len(store) == 0
+
+def test_timer_wheel_returns_due_keys():
+    wheel = TimerWheel(now=0.0, tick=1.0, slots=8)
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 5.0)
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ["a"]
+    assert wheel.advance(10.0) == ["b"]
+
+def test_incomplete_store_fails_on_creation():
+    class IssueOnlyStore(OTPStore):
+        async def issue(self, email, type, code, expires_at):
+            pass
+
+    with pytest.raises(TypeError):
+        IssueOnlyStore()
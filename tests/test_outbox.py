@@ -0,0 +1,55 @@
+
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.future import select
+from app.db.session import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.email_service import EmailService
+from app.services.outbox_worker import OutboxWorker, retry_delay
+
+class RecordingOutboxRepo:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, email_to: str, subject: str, content: str):
+        self.jobs.append((email_to, subject, content))
+
+@pytest.mark.asyncio
+async def test_queue_otp_email_writes_to_outbox():
+    repo = RecordingOutboxRepo()
+    await EmailService(repo).queue_otp_email("queued@example.com", "123456", "Registration")
+    assert len(repo.jobs) == 1
+    email_to, subject, content = repo.jobs[0]
+    assert email_to == "queued@example.com"
+    assert "Registration" in subject
+    assert "123456" in content
+
+def test_retry_delay_is_exponential_and_capped():
+    assert retry_delay(1, 5.0) == 5.0
+    assert retry_delay(2, 5.0) == 10.0
+    assert retry_delay(4, 5.0) == 40.0
+    assert retry_delay(30, 5.0, cap=600.0) == 600.0
+
+@pytest.mark.asyncio
+async def test_purge_deletes_old_finished_jobs_only():
+    email = f"purge_{uuid.uuid4()}@example.com"
+    old = datetime.now(timezone.utc) - timedelta(days=8)
+    async with AsyncSessionLocal() as session:
+        for subject, status, created_at in [
+            ("old-sent", "sent", old),
+            ("old-dead", "dead", old),
+            ("old-pending", "pending", old),
+            ("new-sent", "sent", datetime.now(timezone.utc)),
+        ]:
+            session.add(EmailOutbox(email_to=email, subject=subject, content="", status=status, created_at=created_at))
+        await session.commit()
+
+    worker = OutboxWorker(AsyncSessionLocal, retention_days=7)
+    assert await worker.purge() >= 2
+    async with AsyncSessionLocal() as session:
+        kept = await session.scalars(select(EmailOutbox.subject).where(EmailOutbox.email_to == email))
+        assert sorted(kept) == ["new-sent", "old-pending"]
+        await session.execute(delete(EmailOutbox).where(EmailOutbox.email_to == email))
+        await session.commit()
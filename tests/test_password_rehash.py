@@ -0,0 +1,30 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from passlib.hash import bcrypt
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_hash(client: AsyncClient):
+    email = f"rehash_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(
+            UserCreate(email=email, password="password123"),
+            bcrypt.using(rounds=4).hash("password123"),
+            is_verified=True,
+        )
+        await UnitOfWork(session).commit()
+
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+    assert response.status_code == 200
+
+    async with AsyncSessionLocal() as session:
+        user = await UserRepo(session).get_user_by_email(email)
+    assert user.hashed_password.startswith(f"$2b${settings.PASSWORD_BCRYPT_ROUNDS:02d}$")
+
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+    assert response.status_code == 200
@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.db.prepared import PreparedQuery
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.repos.otp_repo import OTPRepo
+from app.repos.user_repo import UserRepo, UserRow
+from app.schemas.user import UserCreate
+from app.utils.otp import get_otp_expiry
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pgbouncer_mode", [False, True])
+async def test_user_row_matches_orm_user(monkeypatch, pgbouncer_mode):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER_MODE", pgbouncer_mode)
+    email = f"row_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        repo = UserRepo(session)
+        await repo.create_user(UserCreate(email=email, password="x"), "hash")
+        await UnitOfWork(session).commit()
+        row = await repo.get_user_row(email)
+        user = await repo.get_user_by_email(email)
+        assert isinstance(row, UserRow)
+        assert row == (user.id, user.email, "hash", "email", True, False)
+        assert await repo.get_user_row(f"missing_{email}") is None
+
+@pytest.mark.asyncio
+async def test_latest_valid_code():
+    email = f"code_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        repo = OTPRepo(session)
+        assert await repo.get_latest_valid_code(email, "register") is None
+        await repo.create_otp(email, "111111", "register", get_otp_expiry())
+        await UnitOfWork(session).commit()
+        await repo.create_otp(email, "222222", "register", get_otp_expiry())
+        await UnitOfWork(session).commit()
+        assert await repo.get_latest_valid_code(email, "register") == "222222"
+        assert await repo.consume_latest_valid_otp(email, "register", "222222")
+        await UnitOfWork(session).commit()
+        # The used code is skipped; the older one is still valid
+        assert await repo.get_latest_valid_code(email, "register") == "111111"
+
+@pytest.mark.asyncio
+async def test_verify_and_consume_agree_outside_utc(non_utc_timezone):
+    email = f"tz_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        repo = OTPRepo(session)
+        await repo.create_otp(email, "333333", "reset_password", get_otp_expiry())
+        await UnitOfWork(session).commit()
+        assert await repo.get_latest_valid_code(email, "reset_password") == "333333"
+        assert (await repo.get_latest_valid_otp(email, "reset_password")).code == "333333"
+        assert await repo.consume_latest_valid_otp(email, "reset_password", "333333")
+
+@pytest.mark.asyncio
+async def test_first_statement_runs_in_the_session_transaction():
+    transaction_start = PreparedQuery(select(func.now()))
+    async with AsyncSessionLocal() as session:
+        (started,) = await transaction_start.fetchrow(session)
+        await asyncio.sleep(0.01)
+        # now() is fixed for a transaction, so a later statement sees the same value
+        assert await session.scalar(select(func.now())) == started
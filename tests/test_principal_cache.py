@@ -0,0 +1,69 @@
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from app.core.principal_cache import InvalidationChannel, Principal, PrincipalCache, principal_cache
+from app.core.security import get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+class RecordingChannel(InvalidationChannel):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    async def publish(self, email: str):
+        self.published.append(email)
+
+def make_principal(email: str, is_active: bool = True) -> Principal:
+    return Principal(id=uuid.uuid4(), email=email, provider="email", is_active=is_active, is_verified=True)
+
+@pytest.mark.asyncio
+async def test_invalidate_evicts_and_broadcasts():
+    channel = RecordingChannel()
+    cache = PrincipalCache(maxsize=10, ttl=60, channel=channel)
+    cache.set(make_principal("a@example.com"))
+    assert cache.get("a@example.com") is not None
+
+    await cache.invalidate("a@example.com")
+    assert cache.get("a@example.com") is None
+    assert channel.published == ["a@example.com"]
+
+def test_remote_invalidation_evicts():
+    channel = InvalidationChannel()
+    cache = PrincipalCache(maxsize=10, ttl=60, channel=channel)
+    cache.set(make_principal("b@example.com"))
+    channel.deliver("b@example.com")
+    assert cache.get("b@example.com") is None
+
+def test_zero_ttl_disables_cache():
+    cache = PrincipalCache(maxsize=10, ttl=0)
+    cache.set(make_principal("c@example.com"))
+    assert cache.get("c@example.com") is None
+
+@pytest.mark.asyncio
+async def test_cache_miss_reads_the_primary(client: AsyncClient, monkeypatch):
+    email = f"primary_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(
+            UserCreate(email=email, password="password123"), get_password_hash("password123"), is_verified=True
+        )
+        await UnitOfWork(session).commit()
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    lookups = []
+    get_user_row = UserRepo.get_user_row
+
+    async def recording_get_user_row(self, email: str, replica: bool = False):
+        lookups.append(replica)
+        return await get_user_row(self, email, replica)
+
+    monkeypatch.setattr(UserRepo, "get_user_row", recording_get_user_row)
+    await principal_cache.invalidate(email)
+    assert (await client.post("/api/v1/auth/logout-all", headers=headers)).status_code == 200
+    # A lagging replica could otherwise refill the cache with a stale principal
+    assert lookups and not any(lookups)
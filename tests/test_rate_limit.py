@@ -0,0 +1,75 @@
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from app.core.rate_limit import KeyValueRateLimitBackend, MemoryRateLimitBackend, RateLimitBackend, RateLimiter, rate_limiter
+
+@pytest.mark.asyncio
+async def test_sliding_window_weights_previous_window():
+    now = [0.0]
+    backend = MemoryRateLimitBackend(maxsize=10, clock=lambda: now[0])
+    for _ in range(4):
+        assert (await backend.hit("k", limit=4, window=10))[0]
+    allowed, retry_after = await backend.hit("k", limit=4, window=10)
+    assert not allowed and retry_after > 0
+    # Halfway into the next window the previous 4 hits still count as 2
+    now[0] = 15.0
+    assert (await backend.hit("k", limit=4, window=10))[0]
+    assert (await backend.hit("k", limit=4, window=10))[0]
+    assert not (await backend.hit("k", limit=4, window=10))[0]
+    # Two windows later the old hits are gone
+    now[0] = 30.0
+    assert (await backend.hit("k", limit=4, window=10))[0]
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded():
+    backend = MemoryRateLimitBackend(maxsize=3)
+    for i in range(10):
+        await backend.hit(f"k{i}", limit=1, window=60)
+    assert len(backend) == 3
+    assert backend.evictions == 7
+
+class FakeCounterClient:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+    async def pexpire(self, key, ms):
+        pass
+
+@pytest.mark.asyncio
+async def test_shared_backend_enforces_limit_across_limiters():
+    client = FakeCounterClient()
+    workers = [
+        RateLimiter({("login", "email"): 2}, 60, KeyValueRateLimitBackend(client, clock=lambda: 5.0))
+        for _ in range(2)
+    ]
+    await workers[0].check_email("login", "a@example.com")
+    await workers[1].check_email("login", "A@example.com")
+    with pytest.raises(HTTPException) as exc:
+        await workers[0].check_email("login", "a@example.com")
+    assert exc.value.status_code == 429
+
+@pytest.mark.asyncio
+async def test_login_is_throttled_per_email(client: AsyncClient, monkeypatch):
+    monkeypatch.setitem(rate_limiter.limits, ("login", "email"), 2)
+    data = {"username": "throttled@example.com", "password": "wrong"}
+    for _ in range(2):
+        response = await client.post("/api/v1/auth/login", data=data)
+        assert response.status_code == 401
+    response = await client.post("/api/v1/auth/login", data=data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_backend_without_hit_fails_on_creation():
+    class ClearOnlyBackend(RateLimitBackend):
+        def clear(self):
+            pass
+
+    with pytest.raises(TypeError):
+        ClearOnlyBackend()
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.future import select
+from app.core.security import decode_access_token, get_password_hash
+from app.db.maintenance import purge_refresh_tokens
+from app.db.session import AsyncSessionLocal
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+async def login(client: AsyncClient) -> tuple[str, dict]:
+    email = f"refresh_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(
+            UserCreate(email=email, password="password123"), get_password_hash("password123"), is_verified=True
+        )
+        await UnitOfWork(session).commit()
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+    assert response.status_code == 200
+    return email, response.json()
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_token(client: AsyncClient):
+    email, tokens = await login(client)
+    assert tokens["refresh_token"]
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert decode_access_token(rotated["access_token"]).sub == email
+
+@pytest.mark.asyncio
+async def test_reused_refresh_token_revokes_family(client: AsyncClient):
+    _, tokens = await login(client)
+    rotated = (await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).json()
+    # Replaying the old token fails and takes the rotated one down with it
+    replay = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_unknown_refresh_token_is_rejected(client: AsyncClient):
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_purge_keeps_live_and_recent_tokens(client: AsyncClient):
+    email, tokens = await login(client)
+    now = datetime.now(timezone.utc)
+    hashes = {}
+    async with AsyncSessionLocal() as session:
+        user_id = await session.scalar(select(User.id).where(User.email == email))
+        for name, created_at, expires_at, used_at, revoked_at in [
+            ("expired", now - timedelta(days=31), now - timedelta(days=1), None, None),
+            ("old-used", now - timedelta(days=40), now + timedelta(days=1), now - timedelta(days=39), None),
+            ("old-revoked", now - timedelta(days=40), now + timedelta(days=1), None, now - timedelta(days=39)),
+            ("recent-used", now - timedelta(days=1), now + timedelta(days=29), now, None),
+        ]:
+            hashes[name] = uuid.uuid4().hex
+            session.add(RefreshToken(
+                user_id=user_id, family_id=uuid.uuid4(), token_hash=hashes[name],
+                created_at=created_at, expires_at=expires_at, used_at=used_at, revoked_at=revoked_at,
+            ))
+        await session.commit()
+
+    assert await purge_refresh_tokens(AsyncSessionLocal, lifetime_days=30) >= 3
+    async with AsyncSessionLocal() as session:
+        kept = set(await session.scalars(select(RefreshToken.token_hash).where(RefreshToken.user_id == user_id)))
+    assert hashes["recent-used"] in kept
+    assert not kept & {hashes["expired"], hashes["old-used"], hashes["old-revoked"]}
+    # The login's own token survives and still works
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
@@ -0,0 +1,90 @@
+import uuid
+import pytest
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.db.instrumentation import instrument_engine
+from app.db.routing import REPLICA, ReplicaSet, RoutingSession
+from app.db.session import engine
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def make_replicas(clock: Clock, broken: bool = False) -> ReplicaSet:
+    # A second engine on the same database stands in for a replica
+    url = make_url(str(settings.DATABASE_URI))
+    if broken:
+        url = url.set(port=1)
+    replica_engine = create_async_engine(url)
+    instrument_engine(replica_engine.sync_engine, "standin")
+    return ReplicaSet({"standin": replica_engine}, max_lag=10.0, eject_seconds=30.0, clock=clock)
+
+def sessionmaker(replicas: ReplicaSet):
+    return async_sessionmaker(
+        bind=engine, class_=AsyncSession, sync_session_class=RoutingSession,
+        replicas=replicas, expire_on_commit=False, autoflush=False,
+    )
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_until_session_writes():
+    replicas = make_replicas(Clock())
+    replica_engine = replicas.replicas[0].engine
+    email = f"replica_{uuid.uuid4()}@example.com"
+    try:
+        async with sessionmaker(replicas)() as session:
+            repo = UserRepo(session)
+            assert (await session.connection(bind_arguments=dict(REPLICA))).sync_engine is replica_engine.sync_engine
+            assert await repo.get_user_row(email, replica=True) is None
+            assert (await session.connection()).sync_engine is engine.sync_engine
+
+            await repo.create_user(UserCreate(email=email, password="x"), "hash")
+            await UnitOfWork(session).commit()
+            # Read-your-writes: the session now stays on the primary
+            assert (await session.connection(bind_arguments=dict(REPLICA))).sync_engine is engine.sync_engine
+            assert (await repo.get_user_row(email, replica=True)).email == email
+    finally:
+        await replicas.dispose()
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_is_ejected_and_readmitted():
+    clock = Clock()
+    replicas = make_replicas(clock, broken=True)
+    try:
+        await replicas.check()
+        assert replicas.healthy() == []
+        async with sessionmaker(replicas)() as session:
+            assert (await session.connection(bind_arguments=dict(REPLICA))).sync_engine is engine.sync_engine
+        clock.now += 31
+        assert replicas.healthy() == replicas.replicas
+    finally:
+        await replicas.dispose()
+
+@pytest.mark.asyncio
+async def test_connection_error_ejects_replica():
+    replicas = make_replicas(Clock(), broken=True)
+    try:
+        async with sessionmaker(replicas)() as session:
+            with pytest.raises((DBAPIError, OSError)):
+                await UserRepo(session).get_user_row("nobody@example.com", replica=True)
+        assert replicas.replicas[0].ejections == 1
+        assert replicas.choose() is None
+    finally:
+        await replicas.dispose()
+
+@pytest.mark.asyncio
+async def test_health_check_reports_lag():
+    replicas = make_replicas(Clock())
+    try:
+        await replicas.check()
+        assert replicas.replicas[0].lag == 0
+        assert replicas.healthy() == replicas.replicas
+    finally:
+        await replicas.dispose()
@@ -0,0 +1,27 @@
+import json
+import uuid
+from types import SimpleNamespace
+from app.api.responses import ConstantResponse, FastJSONResponse, ModelSerializer
+from app.schemas.token import Token
+from app.schemas.user import UserResponse
+
+def test_model_serializer_matches_pydantic_output():
+    user = SimpleNamespace(id=uuid.uuid4(), email="a@example.com", is_active=True, is_verified=False, hashed_password="x")
+    response = ModelSerializer(UserResponse).response(user)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == json.loads(UserResponse.model_validate(user).model_dump_json())
+
+def test_model_serializer_passes_models_through():
+    token = Token(access_token="a", refresh_token="r", token_type="bearer")
+    response = ModelSerializer(Token).response(token, status_code=201)
+    assert response.status_code == 201
+    assert json.loads(response.body) == {"access_token": "a", "refresh_token": "r", "token_type": "bearer"}
+
+def test_constant_response_is_encoded_once():
+    constant = ConstantResponse({"message": "OTP is valid"})
+    assert constant().body is constant().body
+    assert json.loads(constant().body) == {"message": "OTP is valid"}
+
+def test_fast_json_response_handles_uuid():
+    value = uuid.uuid4()
+    assert json.loads(FastJSONResponse({"id": value}).body) == {"id": str(value)}
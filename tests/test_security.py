@@ -0,0 +1,49 @@
+
+import time
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+from app.core import security
+from app.utils.cache import TTLCache
+
+def test_decode_access_token_uses_cache():
+    security.token_cache.clear()
+    token = security.create_access_token("cached@example.com")
+    hits, misses = security.token_cache.hits, security.token_cache.misses
+
+    assert security.decode_access_token(token).sub == "cached@example.com"
+    assert security.decode_access_token(token).sub == "cached@example.com"
+    assert security.token_cache.misses == misses + 1
+    assert security.token_cache.hits == hits + 1
+
+def test_invalid_token_is_not_cached():
+    security.token_cache.clear()
+    with pytest.raises(JWTError):
+        security.decode_access_token("not-a-token")
+    assert len(security.token_cache) == 0
+
+def test_expired_token_is_rejected():
+    token = security.create_access_token("old@example.com", expires_delta=timedelta(seconds=-1))
+    with pytest.raises(JWTError):
+        security.decode_access_token(token)
+
+def test_ttl_cache_expiry_and_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, time.time() + 60)
+    cache.set("b", 2, time.time() - 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    cache.set("c", 3, time.time() + 60)
+    cache.set("d", 4, time.time() + 60)
+    assert cache.get("a") is None
+    assert len(cache) == 2
+
+def test_password_context_flags_other_costs_for_rehash():
+    context = security.password_context("bcrypt", 5, 3, 65536, 1)
+    old_hash = context.using(bcrypt__rounds=4).hash("secret")
+    assert context.needs_update(old_hash)
+    verified, new_hash = context.verify_and_update("secret", old_hash)
+    assert verified and new_hash.startswith("$2b$05$")
+    assert not context.needs_update(new_hash)
+    assert context.verify_and_update("wrong", old_hash) == (False, None)
@@ -0,0 +1,80 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from app import serve
+from app.core.config import settings
+
+def test_worker_settings_split_connection_budget(monkeypatch):
+    monkeypatch.setattr(settings, "DB_CONNECTION_BUDGET", 40)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", None)
+    assert serve.worker_settings(4, 8) == {"DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 5, "PASSWORD_HASH_WORKERS": 2}
+    assert serve.worker_settings(16, 8) == {"DB_POOL_SIZE": 2, "DB_MAX_OVERFLOW": 0, "PASSWORD_HASH_WORKERS": 1}
+
+def test_restart_delay_backs_off_after_fast_failures():
+    assert serve.restart_delay(0, 0.5) == 0.0
+    assert serve.restart_delay(1, 0.5) == 0.5
+    assert serve.restart_delay(3, 0.5) == 2.0
+    assert serve.restart_delay(20, 0.5) == 30.0
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="preloading forks")
+def test_preloaded_workers_serve_and_drain_on_sigterm():
+    port = free_port()
+    env = {
+        **os.environ,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": "2",
+        "SERVER_PRELOAD": "true",
+        "EMAIL_OUTBOX_WORKER_ENABLED": "false",
+        "OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS": "0",
+    }
+    server = subprocess.Popen([sys.executable, "-m", "app.serve"], env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            assert server.poll() is None
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+FAILING_APP = """
+import sys
+import uvicorn
+from app import serve
+
+async def app(scope, receive, send):
+    await receive()
+    raise RuntimeError("startup failed")
+
+config = uvicorn.Config(app, host="127.0.0.1", port=int(sys.argv[1]), lifespan="on")
+sys.exit(serve.PreforkSupervisor(config, 2).run())
+"""
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="preloading forks")
+def test_supervisor_gives_up_when_workers_keep_failing():
+    env = {**os.environ, "SERVER_RESTART_BACKOFF_SECONDS": "0.05", "SERVER_MAX_FAST_FAILURES": "4"}
+    server = subprocess.run(
+        [sys.executable, "-c", FAILING_APP, str(free_port())], env=env, capture_output=True, text=True, timeout=30
+    )
+    assert server.returncode == 1
+    assert "giving up" in server.stderr
@@ -0,0 +1,70 @@
+import uuid
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.future import select
+from app.core.security import decode_access_token, get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.models.otp import OTP
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+from app.services.token_epochs import TokenEpochs, token_epochs
+
+async def login(client: AsyncClient, email: str) -> dict:
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": "password123"})
+    assert response.status_code == 200
+    return response.json()
+
+async def create_user() -> str:
+    email = f"revoke_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(
+            UserCreate(email=email, password="password123"), get_password_hash("password123"), is_verified=True
+        )
+        await UnitOfWork(session).commit()
+    return email
+
+def logout_all(client: AsyncClient, tokens: dict):
+    return client.post("/api/v1/auth/logout-all", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+@pytest.mark.asyncio
+async def test_logout_all_revokes_earlier_tokens(client: AsyncClient):
+    email = await create_user()
+    first, second = await login(client, email), await login(client, email)
+
+    assert (await logout_all(client, first)).status_code == 200
+    assert (await logout_all(client, second)).status_code == 403
+    refresh = await client.post("/api/v1/auth/refresh", json={"refresh_token": second["refresh_token"]})
+    assert refresh.status_code == 401
+
+    # Logging in again works straight away
+    fresh = await login(client, email)
+    assert (await logout_all(client, fresh)).status_code == 200
+
+@pytest.mark.asyncio
+async def test_reset_password_revokes_tokens(client: AsyncClient):
+    email = await create_user()
+    tokens = await login(client, email)
+    await client.post("/api/v1/auth/forgot-password", json={"email": email})
+    async with AsyncSessionLocal() as session:
+        otp = (await session.scalars(select(OTP).where(OTP.email == email, OTP.type == "reset_password"))).first()
+    response = await client.post("/api/v1/auth/reset-password", json={"email": email, "otp": otp.code, "new_password": "newpassword456"})
+    assert response.status_code == 200
+    assert (await logout_all(client, tokens)).status_code == 403
+
+@pytest.mark.asyncio
+async def test_other_workers_pick_up_revocations(client: AsyncClient):
+    other_worker = TokenEpochs(lifetime=1800)
+    await other_worker.refresh(AsyncSessionLocal)
+    email = await create_user()
+    tokens = await login(client, email)
+    token = decode_access_token(tokens["access_token"])
+    assert not other_worker.revoked(token.sub, token.iat)
+
+    await logout_all(client, tokens)
+    assert token_epochs.revoked(token.sub, token.iat)
+    await other_worker.refresh(AsyncSessionLocal)
+    assert other_worker.revoked(token.sub, token.iat)
+    # Tokens without iat, issued before it existed, are older than any cutoff
+    assert other_worker.revoked(token.sub, None)
+    assert not other_worker.revoked("someone-else@example.com", None)
@@ -0,0 +1,44 @@
+import uuid
+import pytest
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork, after_commit
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+
+@pytest.mark.asyncio
+async def test_create_user_returns_none_on_duplicate_email():
+    email = f"uow_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        repo = UserRepo(session)
+        user = await repo.create_user(UserCreate(email=email, password="password123"), "hash")
+        assert user is not None and user.id is not None
+        await UnitOfWork(session).commit()
+        assert await repo.create_user(UserCreate(email=email, password="password123"), "hash") is None
+
+@pytest.mark.asyncio
+async def test_oauth_upsert_returns_existing_user():
+    email = f"uow_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        repo = UserRepo(session)
+        created = await repo.create_user(UserCreate(email=email, password="password123"), "hash")
+        await UnitOfWork(session).commit()
+        user = await repo.get_or_create_oauth_user(email, provider="google")
+        await UnitOfWork(session).commit()
+        assert user.id == created.id
+        assert user.provider == "email"
+
+@pytest.mark.asyncio
+async def test_after_commit_callbacks_run_only_on_commit():
+    calls = []
+
+    async def record():
+        calls.append(1)
+
+    async with AsyncSessionLocal() as session:
+        uow = UnitOfWork(session)
+        after_commit(session, record)
+        await uow.rollback()
+        assert calls == []
+        after_commit(session, record)
+        await uow.commit()
+        assert calls == [1]
@@ -0,0 +1,116 @@
+import json
+import uuid
+from datetime import timedelta
+import pytest
+from httpx import AsyncClient
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.db.unit_of_work import UnitOfWork
+from app.repos.user_repo import UserRepo
+from app.schemas.user import UserCreate
+from app.utils.stream import iter_lines
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunks():
+    data = b'first\r\nsecond line\n' + b"x" * 50 + b"\nlast"
+    lines = [line async for line in iter_lines(chunked(data, 3), max_line_bytes=20)]
+    assert lines == ["first", "second line", None, "last"]
+
+async def admin_headers(monkeypatch) -> dict:
+    email = f"admin_{uuid.uuid4()}@example.com"
+    async with AsyncSessionLocal() as session:
+        await UserRepo(session).create_user(UserCreate(email=email, password="x"), "hash", is_verified=True)
+        await UnitOfWork(session).commit()
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [email])
+    token = create_access_token(email, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.mark.asyncio
+async def test_import_ndjson_streams_per_row_report(client: AsyncClient, monkeypatch):
+    headers = await admin_headers(monkeypatch)
+    monkeypatch.setattr(settings, "USER_IMPORT_BATCH_SIZE", 2)
+    prefix = uuid.uuid4()
+    hashed = get_password_hash("password123")
+    rows = [
+        {"email": f"a_{prefix}@example.com", "hashed_password": hashed, "is_verified": True},
+        {"email": f"b_{prefix}@example.com", "password": "password123"},
+        {"email": f"a_{prefix}@example.com", "hashed_password": hashed},
+        {"email": "not-an-email", "hashed_password": hashed},
+        {"email": f"c_{prefix}@example.com", "hashed_password": "plain"},
+    ]
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode()
+    response = await client.post(
+        "/api/v1/admin/users/import",
+        content=chunked(body, 17),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert [r.get("status") for r in report[:-1]] == ["created", "created", "exists", "invalid", "invalid"]
+    assert report[-1]["summary"]["created"] == 2
+
+    login = await client.post("/api/v1/auth/login", data={"username": f"a_{prefix}@example.com", "password": "password123"})
+    assert login.status_code == 200
+
+@pytest.mark.asyncio
+async def test_import_csv(client: AsyncClient, monkeypatch):
+    headers = await admin_headers(monkeypatch)
+    hashed = get_password_hash("password123")
+    email = f"csv_{uuid.uuid4()}@example.com"
+    body = f"email,hashed_password\n{email},{hashed}\n{email},{hashed}\n".encode()
+    response = await client.post(
+        "/api/v1/admin/users/import",
+        content=body,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    report = [json.loads(line) for line in response.text.splitlines()]
+    assert [r.get("status") for r in report[:-1]] == ["created", "duplicate"]
+
+@pytest.mark.asyncio
+async def test_import_requires_admin(client: AsyncClient, monkeypatch):
+    headers = await admin_headers(monkeypatch)
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+    response = await client.post("/api/v1/admin/users/import", content=b"", headers=headers)
+    assert response.status_code == 403
+
+async def seed_users(provider: str, count: int):
+    async with AsyncSessionLocal() as session:
+        repo = UserRepo(session)
+        for i in range(count):
+            await repo.create_user(UserCreate(email=f"{i}_{provider}@example.com", password="x"), "hash", provider=provider)
+            await UnitOfWork(session).commit()
+
+@pytest.mark.asyncio
+async def test_list_users_keyset_pages(client: AsyncClient, monkeypatch):
+    headers = await admin_headers(monkeypatch)
+    provider = f"p{uuid.uuid4().hex[:8]}"
+    await seed_users(provider, 3)
+    first = (await client.get("/api/v1/admin/users", params={"provider": provider, "limit": 2}, headers=headers)).json()
+    assert [u["email"] for u in first["items"]] == [f"0_{provider}@example.com", f"1_{provider}@example.com"]
+    second = (await client.get(
+        "/api/v1/admin/users",
+        params={"provider": provider, "limit": 2, "cursor": first["next_cursor"]},
+        headers=headers,
+    )).json()
+    assert [u["email"] for u in second["items"]] == [f"2_{provider}@example.com"]
+    assert second["next_cursor"] is None
+    bad = await client.get("/api/v1/admin/users", params={"cursor": "nope"}, headers=headers)
+    assert bad.status_code == 400
+
+@pytest.mark.asyncio
+async def test_export_users_streams_csv_and_ndjson(client: AsyncClient, monkeypatch):
+    headers = await admin_headers(monkeypatch)
+    provider = f"p{uuid.uuid4().hex[:8]}"
+    await seed_users(provider, 3)
+    csv_response = await client.get("/api/v1/admin/users/export", params={"provider": provider, "format": "csv"}, headers=headers)
+    lines = csv_response.text.splitlines()
+    assert lines[0] == "id,email,provider,is_active,is_verified,created_at"
+    assert len(lines) == 4
+    ndjson_response = await client.get("/api/v1/admin/users/export", params={"provider": provider}, headers=headers)
+    rows = [json.loads(line) for line in ndjson_response.text.splitlines()]
+    assert [r["email"] for r in rows] == [f"{i}_{provider}@example.com" for i in range(3)]
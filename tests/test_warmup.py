@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.core.warmup import Warmup, warm_database
+from app.db.session import engine
+from app.main import create_app
+
+@pytest.mark.asyncio
+async def test_warm_database_fills_pool():
+    assert await warm_database(engine, 3) == 3
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_up_and_disposes(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_WORKER_ENABLED", False)
+    monkeypatch.setattr(settings, "OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "WARMUP_DB_CONNECTIONS", 2)
+    warmup = Warmup()
+    monkeypatch.setattr("app.main.warmup", warmup)
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        assert warmup.stats()["connections"] == 2
+        assert warmup.failures == 0
+        assert engine.pool.checkedin() == 2
+    assert engine.pool.checkedin() == 0
+
+@pytest.mark.asyncio
+async def test_lifespan_drains_background_tasks_before_disposing(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_WORKER_ENABLED", False)
+    monkeypatch.setattr(settings, "OTP_PARTITION_MAINTENANCE_INTERVAL_SECONDS", 3600)
+    pending_at_close = []
+
+    async def close_http_client():
+        pending_at_close.extend(task for task in background if not task.done())
+
+    monkeypatch.setattr("app.main.close_http_client", close_http_client)
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        background = [
+            task for task in asyncio.all_tasks()
+            if task.get_coro().__name__ in ("run_maintenance_loop", "run_refresh")
+        ]
+        assert len(background) == 2
+    assert pending_at_close == []
+    assert engine.pool.checkedout() == 0